@@ -0,0 +1,13 @@
+-- Adds the analysis_summaries read model to an existing database.
+-- Populate it afterwards with `python summaries.py backfill`.
+CREATE TABLE IF NOT EXISTS analysis_summaries (
+    pdf_id INTEGER NOT NULL REFERENCES pdfs(id),
+    analysis_type TEXT NOT NULL,
+    analysis_id INTEGER NOT NULL REFERENCES pdf_analyses(id) ON DELETE CASCADE,
+    pdf_filename TEXT,
+    analysis_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    result JSONB NOT NULL,
+    PRIMARY KEY (pdf_id, analysis_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_summaries_analysis_id ON analysis_summaries (analysis_id);
@@ -0,0 +1,3 @@
+-- Index backing ingest.py's resume check (documents already loaded, by stored
+-- name) on an existing database.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pdfs_filename ON pdfs (filename);
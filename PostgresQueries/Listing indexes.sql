@@ -0,0 +1,11 @@
+-- Indexes and constraints backing the keyset-paginated listing endpoints
+-- (GET /api/v1/pdfs and GET /api/v1/pdfs/<id>/analyses) on an existing database.
+-- The pagination keys must not be NULL for row-value comparisons to work.
+UPDATE pdfs SET upload_date = CURRENT_TIMESTAMP WHERE upload_date IS NULL;
+ALTER TABLE pdfs ALTER COLUMN upload_date SET NOT NULL;
+
+UPDATE pdf_analyses SET analysis_date = CURRENT_TIMESTAMP WHERE analysis_date IS NULL;
+ALTER TABLE pdf_analyses ALTER COLUMN analysis_date SET NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pdfs_upload_date_id ON pdfs (upload_date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_pdf_analyses_pdf_date ON pdf_analyses (pdf_id, analysis_date, id);
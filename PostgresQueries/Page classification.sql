@@ -0,0 +1,4 @@
+-- Adds the per-page pre-scan classification to pdf_analyses on an existing database.
+ALTER TABLE pdf_analyses ADD COLUMN IF NOT EXISTS page_classes JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_pdf_analyses_needs_ocr ON pdf_analyses (pdf_id) WHERE page_classes ? 'image_only';
@@ -0,0 +1,47 @@
+-- Migrates an existing (unpartitioned) extracted_data table to the partitioned
+-- layout from "Table creations.sql". Monthly partitions are created for every
+-- month from the oldest analysis up to two months ahead (PARTITION_MONTHS_AHEAD)
+-- before the rows are copied, so they land directly in their partition and the
+-- default partition starts empty; nothing has to be split out of it later.
+-- `python compact.py --partitions-only` keeps creating partitions ahead without
+-- deleting anything (plain `python compact.py` also applies the retention policy).
+BEGIN;
+
+ALTER TABLE extracted_data RENAME TO extracted_data_unpartitioned;
+ALTER SEQUENCE extracted_data_id_seq RENAME TO extracted_data_unpartitioned_id_seq;
+
+CREATE TABLE extracted_data (
+    id SERIAL,
+    analysis_id INTEGER REFERENCES pdf_analyses(id),
+    data_key TEXT,
+    data_value TEXT,
+    analysis_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, analysis_date)
+) PARTITION BY RANGE (analysis_date);
+
+CREATE TABLE extracted_data_default PARTITION OF extracted_data DEFAULT;
+
+DO $$
+DECLARE
+    m TIMESTAMP := date_trunc('month', LEAST((SELECT min(analysis_date) FROM pdf_analyses), LOCALTIMESTAMP));
+BEGIN
+    WHILE m <= date_trunc('month', LOCALTIMESTAMP) + INTERVAL '2 months' LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF extracted_data FOR VALUES FROM (%L) TO (%L)',
+                       'extracted_data_p' || to_char(m, 'YYYYMM'), m, m + INTERVAL '1 month');
+        m := m + INTERVAL '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO extracted_data (id, analysis_id, data_key, data_value, analysis_date)
+SELECT ed.id, ed.analysis_id, ed.data_key, ed.data_value, COALESCE(pa.analysis_date, LOCALTIMESTAMP)
+FROM extracted_data_unpartitioned ed
+LEFT JOIN pdf_analyses pa ON pa.id = ed.analysis_id;
+
+SELECT setval('extracted_data_id_seq', COALESCE((SELECT max(id) FROM extracted_data), 0) + 1, false);
+
+CREATE INDEX idx_extracted_data_analysis_id ON extracted_data (analysis_id);
+CREATE INDEX IF NOT EXISTS idx_pdf_analyses_retention ON pdf_analyses (pdf_id, analysis_type, analysis_date DESC, id DESC);
+
+DROP TABLE extracted_data_unpartitioned;
+
+COMMIT;
@@ -2,21 +2,66 @@
 CREATE TABLE pdfs (
     id SERIAL PRIMARY KEY,
     filename TEXT,
-    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    upload_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Keyset pagination for GET /api/v1/pdfs (ORDER BY upload_date DESC, id DESC)
+CREATE INDEX idx_pdfs_upload_date_id ON pdfs (upload_date, id);
+
+-- ingest.py looks up stored names to skip documents an interrupted run already loaded
+CREATE INDEX idx_pdfs_filename ON pdfs (filename);
+
 -- Create the pdf_analyses table
 CREATE TABLE pdf_analyses (
     id SERIAL PRIMARY KEY,
     pdf_id INTEGER REFERENCES pdfs(id),
     analysis_type TEXT,
-    analysis_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    analysis_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    page_classes JSONB -- Pre-scan class per page: "text", "image_only", "mixed" or "empty"
 );
 
+-- Candidates for a future OCR queue: analyses with at least one scanned page
+CREATE INDEX idx_pdf_analyses_needs_ocr ON pdf_analyses (pdf_id) WHERE page_classes ? 'image_only';
+
+-- Keyset pagination for GET /api/v1/pdfs/<id>/analyses (ORDER BY analysis_date DESC, id DESC)
+CREATE INDEX idx_pdf_analyses_pdf_date ON pdf_analyses (pdf_id, analysis_date, id);
+
+-- Supports the retention ranking (latest analyses per pdf/type) used by compact.py
+CREATE INDEX idx_pdf_analyses_retention ON pdf_analyses (pdf_id, analysis_type, analysis_date DESC, id DESC);
+
 -- Create the extracted_data table
+-- Range-partitioned by month on analysis_date so expired history can be dropped
+-- a partition at a time. analysis_date defaults to the transaction timestamp, i.e.
+-- the same value as the parent pdf_analyses row written in the same transaction.
+-- Monthly partitions (extracted_data_pYYYYMM) are created by compact.py; rows that
+-- arrive before their partition exists land in the default partition and are moved
+-- out when it is created.
 CREATE TABLE extracted_data (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     analysis_id INTEGER REFERENCES pdf_analyses(id),
     data_key TEXT,
-    data_value TEXT
-);
\ No newline at end of file
+    data_value TEXT,
+    analysis_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, analysis_date)
+) PARTITION BY RANGE (analysis_date);
+
+CREATE TABLE extracted_data_default PARTITION OF extracted_data DEFAULT;
+
+CREATE INDEX idx_extracted_data_analysis_id ON extracted_data (analysis_id);
+
+-- Create the analysis_summaries table
+-- Denormalized read model: the latest result per (pdf_id, analysis_type) as one
+-- JSONB document ({data_key: [data_value, ...]}). Maintained in the same
+-- transaction that writes pdf_analyses/extracted_data; rebuilt or verified
+-- with summaries.py.
+CREATE TABLE analysis_summaries (
+    pdf_id INTEGER NOT NULL REFERENCES pdfs(id),
+    analysis_type TEXT NOT NULL,
+    analysis_id INTEGER NOT NULL REFERENCES pdf_analyses(id) ON DELETE CASCADE,
+    pdf_filename TEXT,
+    analysis_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    result JSONB NOT NULL,
+    PRIMARY KEY (pdf_id, analysis_type)
+);
+
+CREATE INDEX idx_analysis_summaries_analysis_id ON analysis_summaries (analysis_id);
@@ -1,6 +1,7 @@
 import os
 import re
 import psycopg2
+from psycopg2.extras import Json
 import logging
 import csv  # Added for CSV export
 import io   # Added for CSV export (in-memory stream)
@@ -23,9 +24,9 @@ logging.basicConfig(level=logging.INFO)
 if not os.path.exists(UPLOAD_FOLDER):
     try:
         os.makedirs(UPLOAD_FOLDER)
-        logging.info(f"Created upload folder: {UPLOAD_FOLDER}")
+        logging.info("Created upload folder: %s", UPLOAD_FOLDER)
     except OSError as e:
-        logging.error(f"Error creating upload folder {UPLOAD_FOLDER}: {e}")
+        logging.error("Error creating upload folder %s: %s", UPLOAD_FOLDER, e)
         exit(1)
 
 # --- Custom Exception for Not Found ---
@@ -45,7 +46,7 @@ def get_db_connection():
         conn = psycopg2.connect(conn_str)
         return conn
     except psycopg2.Error as e:
-        logging.error(f"Error connecting to database: {e}")
+        logging.error("Error connecting to database: %s", e)
         raise # Propagate the error
 
 # --- Utility Functions ---
@@ -59,7 +60,7 @@ def extract_text_from_pdf(pdf_path):
         text = pdfminer.high_level.extract_text(pdf_path)
         return text
     except Exception as e:
-        logging.error(f"Error extracting text from {pdf_path}: {e}")
+        logging.error("Error extracting text from %s: %s", pdf_path, e)
         return ""
 
 def extract_components(text):
@@ -81,6 +82,8 @@ def extract_components(text):
 def _get_analysis_data(pdf_id: int):
     """
     Helper function to retrieve filename and component analysis results for a PDF ID.
+    Reads the analysis_summaries read model shared with the pdf-analyzer API
+    (latest analysis only); falls back to pdfs to tell "not analyzed" from "not found".
     Raises NotFoundError if the PDF doesn't exist.
     Returns tuple (pdf_filename, components_list).
     """
@@ -89,38 +92,29 @@ def _get_analysis_data(pdf_id: int):
         conn = get_db_connection()
         cur = conn.cursor()
 
-        # 1. Get PDF filename
-        cur.execute('SELECT filename FROM pdfs WHERE id = %s', (pdf_id,))
-        pdf_record = cur.fetchone()
-        if pdf_record is None:
-            raise NotFoundError(f"PDF with id {pdf_id} not found")
-        pdf_filename = pdf_record[0]
-        logging.info(f"Fetching analysis data for PDF ID: {pdf_id} (File: {pdf_filename})")
-
-        # 2. Get associated components (assuming 'component_extraction' type)
-        # Consider making analysis_type dynamic if you add more types later
         analysis_type = 'component_extraction'
         cur.execute(
-            """
-            SELECT ed.data_value
-            FROM extracted_data ed
-            JOIN pdf_analyses pa ON ed.analysis_id = pa.id
-            WHERE pa.pdf_id = %s
-              AND pa.analysis_type = %s
-              AND ed.data_key = %s
-            ORDER BY ed.id ASC -- Order by insertion order or data_value
-            """,
-            (pdf_id, analysis_type, 'component_name')
+            'SELECT pdf_filename, result FROM analysis_summaries WHERE pdf_id = %s AND analysis_type = %s',
+            (pdf_id, analysis_type)
         )
-        results = cur.fetchall()
-        components = [row[0] for row in results]
-        logging.info(f"Found {len(components)} components in database for PDF ID {pdf_id}")
+        summary = cur.fetchone()
+        if summary is not None:
+            pdf_filename, result = summary
+        else:
+            cur.execute('SELECT filename FROM pdfs WHERE id = %s', (pdf_id,))
+            pdf_record = cur.fetchone()
+            if pdf_record is None:
+                raise NotFoundError(f"PDF with id {pdf_id} not found")
+            pdf_filename, result = pdf_record[0], {}
+        logging.info("Fetching analysis data for PDF ID: %s (File: %s)", pdf_id, pdf_filename)
+        components = result.get('component_name', [])
+        logging.info("Found %s components in database for PDF ID %s", len(components), pdf_id)
 
         cur.close()
         return pdf_filename, components, analysis_type # Return type as well
 
     except psycopg2.Error as db_err:
-        logging.error(f"Database error fetching data for PDF ID {pdf_id}: {db_err}")
+        logging.error("Database error fetching data for PDF ID %s: %s", pdf_id, db_err)
         raise # Re-raise database errors to be handled by the route
     finally:
         if conn:
@@ -143,10 +137,10 @@ def health():
         status = 'ok'
         return jsonify({'status': status, "database_version": db_version})
     except psycopg2.Error as e:
-        logging.error(f"Health check database error: {e}")
+        logging.error("Health check database error: %s", e)
         return jsonify({'status': status, 'error': 'Database connection failed'}), 500
     except Exception as e:
-        logging.error(f"Health check unexpected error: {e}")
+        logging.error("Health check unexpected error: %s", e)
         return jsonify({'status': status, 'error': 'An unexpected error occurred'}), 500
     finally:
         if conn:
@@ -171,20 +165,20 @@ def upload_pdf():
         conn = None
         try:
             file.save(filepath)
-            logging.info(f"File saved successfully: {filepath}")
+            logging.info("File saved successfully: %s", filepath)
             conn = get_db_connection()
             cur = conn.cursor()
             cur.execute('INSERT INTO pdfs (filename) VALUES (%s) RETURNING id', (filename,))
             pdf_id = cur.fetchone()[0]
             conn.commit()
             cur.close()
-            logging.info(f"PDF record created in database with ID: {pdf_id}")
+            logging.info("PDF record created in database with ID: %s", pdf_id)
             return jsonify({'message': 'PDF uploaded successfully', 'pdf_id': pdf_id}), 201
         except psycopg2.Error as e:
-            logging.error(f"Database error during PDF upload for {filename}: {e}")
+            logging.error("Database error during PDF upload for %s: %s", filename, e)
             return jsonify({'error': 'Database error during upload'}), 500
         except Exception as e:
-            logging.error(f"Error saving file {filename}: {e}")
+            logging.error("Error saving file %s: %s", filename, e)
             return jsonify({'error': f'Failed to save file: {e}'}), 500
         finally:
             if conn:
@@ -203,47 +197,63 @@ def analyze_pdf(pdf_id):
         cur.execute('SELECT filename FROM pdfs WHERE id = %s', (pdf_id,))
         pdf_record = cur.fetchone()
         if pdf_record is None:
-            logging.warning(f"Analysis requested for non-existent PDF ID: {pdf_id}")
+            logging.warning("Analysis requested for non-existent PDF ID: %s", pdf_id)
             return jsonify({'error': f'PDF with id {pdf_id} not found'}), 404
         pdf_filename = pdf_record[0]
         pdf_path = os.path.join(UPLOAD_FOLDER, pdf_filename)
         if not os.path.exists(pdf_path):
-             logging.error(f"File not found on disk for PDF ID {pdf_id}: {pdf_path}")
+             logging.error("File not found on disk for PDF ID %s: %s", pdf_id, pdf_path)
              return jsonify({'error': 'PDF file not found on server'}), 404
-        logging.info(f"Starting text extraction for: {pdf_path}")
+        logging.info("Starting text extraction for: %s", pdf_path)
         extracted_text = extract_text_from_pdf(pdf_path)
         if not extracted_text:
-            logging.warning(f"No text extracted from PDF ID {pdf_id}: {pdf_path}")
-        logging.info(f"Starting component extraction for PDF ID: {pdf_id}")
+            logging.warning("No text extracted from PDF ID %s: %s", pdf_id, pdf_path)
+        logging.info("Starting component extraction for PDF ID: %s", pdf_id)
         components = extract_components(extracted_text)
-        logging.info(f"Found {len(components)} components for PDF ID {pdf_id}: {components}")
+        logging.info("Found %s components for PDF ID %s", len(components), pdf_id)
+        logging.debug("Components for PDF ID %s: %.2000s", pdf_id, components) # Full list only at DEBUG, capped
         cur.execute(
              'INSERT INTO pdf_analyses (pdf_id, analysis_type) VALUES (%s, %s) RETURNING id',
              (pdf_id, 'component_extraction'),
         )
         analysis_id = cur.fetchone()[0]
-        logging.info(f"Created analysis record ID {analysis_id} for PDF ID {pdf_id}")
+        logging.info("Created analysis record ID %s for PDF ID %s", analysis_id, pdf_id)
         if components:
             component_data = [(analysis_id, 'component_name', comp) for comp in components]
             cur.executemany(
                 'INSERT INTO extracted_data (analysis_id, data_key, data_value) VALUES (%s, %s, %s)',
                 component_data
             )
-            logging.info(f"Inserted {len(components)} components into extracted_data for analysis ID {analysis_id}")
+            logging.info("Inserted %s components into extracted_data for analysis ID %s", len(components), analysis_id)
         else:
-            logging.info(f"No components to insert for analysis ID {analysis_id}")
+            logging.info("No components to insert for analysis ID %s", analysis_id)
+        # Same transaction: keep analysis_summaries (what the pdf-analyzer API serves) current,
+        # never replacing a summary that already points at a newer analysis
+        cur.execute(
+            """
+            INSERT INTO analysis_summaries (pdf_id, analysis_type, analysis_id, pdf_filename, analysis_date, result)
+            SELECT pa.pdf_id, pa.analysis_type, pa.id, p.filename, pa.analysis_date, %s
+            FROM pdf_analyses pa JOIN pdfs p ON p.id = pa.pdf_id
+            WHERE pa.id = %s
+            ON CONFLICT (pdf_id, analysis_type) DO UPDATE
+            SET analysis_id = EXCLUDED.analysis_id, pdf_filename = EXCLUDED.pdf_filename,
+                analysis_date = EXCLUDED.analysis_date, result = EXCLUDED.result
+            WHERE analysis_summaries.analysis_id <= EXCLUDED.analysis_id
+            """,
+            (Json({'component_name': components} if components else {}), analysis_id)
+        )
         conn.commit()
         cur.close()
         return jsonify({'message': f'Analysis complete for PDF ID {pdf_id}', 'analysis_id': analysis_id, 'components_found': len(components)})
     except psycopg2.Error as e:
-        logging.error(f"Database error during analysis for PDF ID {pdf_id}: {e}")
+        logging.error("Database error during analysis for PDF ID %s: %s", pdf_id, e)
         if conn: conn.rollback()
         return jsonify({'error': 'Database error during analysis'}), 500
     except FileNotFoundError:
-         logging.error(f"File vanished during analysis for PDF ID {pdf_id}: {pdf_path}")
+         logging.error("File vanished during analysis for PDF ID %s: %s", pdf_id, pdf_path)
          return jsonify({'error': 'PDF file disappeared during analysis'}), 500
     except Exception as e:
-        logging.error(f"Unexpected error during analysis for PDF ID {pdf_id}: {e}")
+        logging.error("Unexpected error during analysis for PDF ID %s: %s", pdf_id, e)
         if conn: conn.rollback()
         return jsonify({'error': 'An unexpected error occurred during analysis'}), 500
     finally:
@@ -267,13 +277,13 @@ def get_analysis_results(pdf_id):
         }), 200
 
     except NotFoundError as e:
-        logging.warning(f"NotFound error fetching results for PDF ID {pdf_id}: {e}")
+        logging.warning("NotFound error fetching results for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': str(e)}), 404
     except psycopg2.Error as e: # Catch potential DB errors propagated from helper
-        logging.error(f"Database error fetching results for PDF ID {pdf_id}: {e}")
+        logging.error("Database error fetching results for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'Database error occurred while fetching results'}), 500
     except Exception as e:
-        logging.error(f"Unexpected error fetching results for PDF ID {pdf_id}: {e}")
+        logging.error("Unexpected error fetching results for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'An internal server error occurred while fetching results'}), 500
 
 
@@ -330,17 +340,17 @@ def export_analysis_results(pdf_id):
 
         # Handle invalid format request
         else:
-            logging.warning(f"Invalid export format requested: {req_format} for PDF ID {pdf_id}")
+            logging.warning("Invalid export format requested: %s for PDF ID %s", req_format, pdf_id)
             return jsonify({'error': f"Unsupported format: {req_format}. Use 'json' or 'csv'."}), 400
 
     except NotFoundError as e:
-        logging.warning(f"NotFound error during export for PDF ID {pdf_id}: {e}")
+        logging.warning("NotFound error during export for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': str(e)}), 404
     except psycopg2.Error as e:
-        logging.error(f"Database error during export for PDF ID {pdf_id}: {e}")
+        logging.error("Database error during export for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'Database error occurred during export'}), 500
     except Exception as e:
-        logging.error(f"Unexpected error during export for PDF ID {pdf_id}: {e}")
+        logging.error("Unexpected error during export for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'An internal server error occurred during export'}), 500
 
 
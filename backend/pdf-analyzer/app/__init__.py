@@ -3,11 +3,14 @@ import logging
 from flask import Flask
 from flask_cors import CORS
 from .config import config # Import the config dictionary
+from .utils.log_config import configure_logging
 
 # Import blueprints
 from .routes.general_routes import general_bp
 from .routes.pdf_routes import pdf_bp
 
+logger = logging.getLogger(__name__)
+
 def create_app(config_name='default'):
     """Application factory function."""
     app = Flask(__name__)
@@ -18,20 +21,20 @@ def create_app(config_name='default'):
     # Initialize extensions
     CORS(app) # Enable CORS
 
-    # Configure logging
-    logging.basicConfig(level=logging.INFO if not app.config['DEBUG'] else logging.DEBUG)
+    # Configure logging (queue-backed, formatted off the request thread)
+    configure_logging(app.config)
 
     # Ensure upload folder exists
     try:
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        logging.info(f"Upload folder checked/created: {app.config['UPLOAD_FOLDER']}")
+        logger.info("Upload folder checked/created: %s", app.config['UPLOAD_FOLDER'])
     except OSError as e:
-        logging.error(f"Error creating upload folder {app.config['UPLOAD_FOLDER']}: {e}")
+        logger.error("Error creating upload folder %s: %s", app.config['UPLOAD_FOLDER'], e)
         # Handle error appropriately - maybe raise it?
 
     # Register Blueprints
     app.register_blueprint(general_bp)
     app.register_blueprint(pdf_bp)
 
-    logging.info(f"Flask App created with config: {config_name}")
+    logger.info("Flask App created with config: %s", config_name)
     return app
\ No newline at end of file
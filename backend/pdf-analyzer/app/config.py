@@ -15,9 +15,41 @@ class Config:
     UPLOAD_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'uploads')) # Path relative to project root
     ALLOWED_EXTENSIONS = {'pdf'}
 
+    # Logging (see app/utils/log_config.py)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') # Unset: DEBUG when DEBUG is on, else INFO
+    LOG_JSON = True # One JSON object per line
+    LOG_QUEUE_SIZE = 10000 # Records buffered for the background writer; overflow is dropped
+    LOG_MAX_MESSAGE_CHARS = 2000 # Longer messages/tracebacks are truncated
+    LOG_MAX_ARG_ITEMS = 20 # Lists/dicts passed as log args are capped to this many items
+    LOG_RATE_LIMIT_PER_SEC = 50 # Per-logger budget for DEBUG/INFO records (None disables)
+    LOG_RATE_LIMIT_BURST = 100
+    LOG_RATE_LIMITS = {} # Per-logger overrides, e.g. {'app.services.pdf_service': 10}
+    LOG_LEVEL_OVERRIDES = {'pdfminer': 'WARNING'} # pdfminer logs every token at DEBUG
+
+    # Offline bulk ingest (ingest.py)
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500)) # Documents per COPY transaction
+
+    # Analysis history retention (compact.py)
+    # Keep the last N analyses per (pdf_id, analysis_type) OR anything younger than MAX_AGE_DAYS.
+    RETENTION_KEEP_LAST = int(os.environ.get('RETENTION_KEEP_LAST', 5))
+    RETENTION_MAX_AGE_DAYS = int(os.environ.get('RETENTION_MAX_AGE_DAYS', 30))
+    COMPACTION_BATCH_SIZE = 500 # Analyses deleted per transaction
+    COMPACTION_PAUSE_SECONDS = 0.05 # Breather between delete batches
+    COMPACTION_LOCK_TIMEOUT = '2s'
+    PARTITION_MONTHS_AHEAD = 2 # extracted_data partitions created ahead of time
+    PARTITION_MOVE_BATCH_SIZE = 10000 # Rows moved out of the default partition per transaction
+
+    # analysis_summaries read model (summaries.py)
+    SUMMARY_BACKFILL_BATCH_SIZE = 1000 # PDF ids per backfill transaction
+
+    # Listing endpoints (GET /pdfs, GET /pdfs/<id>/analyses)
+    LIST_PAGE_SIZE_DEFAULT = 50
+    LIST_PAGE_SIZE_MAX = 500
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
+    LOG_JSON = False # Plain text is easier to read in a terminal
     # You might override DATABASE_URL here for dev if needed
 
 class ProductionConfig(Config):
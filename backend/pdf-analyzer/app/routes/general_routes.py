@@ -3,6 +3,8 @@ import psycopg2
 from flask import Blueprint, jsonify, current_app
 from app.services.db_service import get_db_connection # Import from service
 
+logger = logging.getLogger(__name__)
+
 # Define blueprint
 general_bp = Blueprint('general', __name__, url_prefix='/api/v1')
 
@@ -20,14 +22,14 @@ def health():
         db_version = cur.fetchone()
         cur.close()
         status = 'ok'
-        logging.info("Health check successful.")
+        logger.info("Health check successful.")
         return jsonify({'status': status, "database_version": db_version})
     except (psycopg2.Error, ValueError) as e: # Catch DB errors or config errors
-        logging.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         # Ensure status remains 'error'
         return jsonify({'status': 'error', 'error': 'Service unavailable or database connection failed'}), 503 # 503 Service Unavailable
     except Exception as e:
-        logging.error(f"Health check unexpected error: {e}")
+        logger.error("Health check unexpected error: %s", e)
         return jsonify({'status': 'error', 'error': 'An unexpected error occurred'}), 500
     finally:
         if conn:
@@ -36,5 +38,5 @@ def health():
 @general_bp.route('/test_connection', methods=['GET'])
 def test_connection():
     """Simple endpoint to confirm backend is running."""
-    logging.debug("Test connection endpoint called.")
+    logger.debug("Test connection endpoint called.")
     return jsonify({'message': 'Backend connection successful!'})
\ No newline at end of file
@@ -7,10 +7,12 @@ from flask import Blueprint, jsonify, request, make_response, current_app
 from werkzeug.utils import secure_filename
 
 # Import helpers, services, exceptions
-from app.utils.helpers import allowed_file
-from app.services.pdf_service import extract_text_from_pdf, extract_components
-from app.services.db_service import get_db_connection, _get_analysis_data
-from app.utils.exceptions import NotFoundError
+from app.utils.helpers import allowed_file, encode_cursor, decode_cursor, parse_bool_arg, parse_datetime_arg
+from app.services.analysis_service import run_analyses, get_analyzer, DEFAULT_ANALYSIS_TYPE
+from app.services.db_service import get_db_connection, _get_analysis_data, save_analysis_results, list_pdfs, list_analyses, count_page_classes
+from app.utils.exceptions import NotFoundError, UnknownAnalysisTypeError
+
+logger = logging.getLogger(__name__)
 
 # Define blueprint
 pdf_bp = Blueprint('pdf', __name__, url_prefix='/api/v1')
@@ -22,11 +24,11 @@ def upload_pdf():
     upload_folder = current_app.config['UPLOAD_FOLDER']
 
     if 'file' not in request.files:
-        logging.warning("Upload attempt failed: No file part.")
+        logger.warning("Upload attempt failed: No file part.")
         return jsonify({'error': 'No file part in the request'}), 400
     file = request.files['file']
     if file.filename == '':
-        logging.warning("Upload attempt failed: No selected file.")
+        logger.warning("Upload attempt failed: No selected file.")
         return jsonify({'error': 'No selected file'}), 400
 
     if file and allowed_file(file.filename): # Use helper function
@@ -35,7 +37,7 @@ def upload_pdf():
         conn = None
         try:
             file.save(filepath)
-            logging.info(f"File saved successfully: {filepath}")
+            logger.info("File saved successfully: %s", filepath)
 
             conn = get_db_connection() # Use service function
             cur = conn.cursor()
@@ -44,31 +46,39 @@ def upload_pdf():
             pdf_id = cur.fetchone()[0]
             conn.commit()
             cur.close()
-            logging.info(f"PDF record created in database with ID: {pdf_id}")
+            logger.info("PDF record created in database with ID: %s", pdf_id)
             return jsonify({'message': 'PDF uploaded successfully', 'pdf_id': pdf_id}), 201
 
         except psycopg2.Error as e:
-            logging.error(f"Database error during PDF upload for {filename}: {e}")
+            logger.error("Database error during PDF upload for %s: %s", filename, e)
             # Consider cleaning up saved file if DB fails: if os.path.exists(filepath): os.remove(filepath)
             return jsonify({'error': 'Database error during upload'}), 500
         except Exception as e:
             # Catch file save errors etc.
-            logging.error(f"Error during file upload process for {filename}: {e}")
+            logger.error("Error during file upload process for %s: %s", filename, e)
             return jsonify({'error': f'Failed to save or process file: {e}'}), 500
         finally:
             if conn:
                 conn.close()
     else:
-        logging.warning(f"Upload attempt failed: Invalid file type for {file.filename}.")
+        logger.warning("Upload attempt failed: Invalid file type for %s.", file.filename)
         return jsonify({'error': 'Invalid file type. Only PDF allowed.'}), 400
 
 
 @pdf_bp.route('/analyze_pdf/<int:pdf_id>', methods=['POST'])
 def analyze_pdf(pdf_id):
-    """Triggers text extraction and component analysis for a given PDF ID."""
+    """
+    Parses a PDF once and runs the requested analyzers over it.
+    Analyzers are chosen with repeated ?analysis_type= query params
+    (default: component_extraction); each gets its own pdf_analyses record.
+    """
     upload_folder = current_app.config['UPLOAD_FOLDER']
+    analysis_types = request.args.getlist('analysis_type') or [DEFAULT_ANALYSIS_TYPE]
     conn = None
     try:
+        for analysis_type in analysis_types:
+            get_analyzer(analysis_type) # Validate before touching the DB or the file
+
         conn = get_db_connection()
         cur = conn.cursor()
 
@@ -82,58 +92,51 @@ def analyze_pdf(pdf_id):
 
         # 2. Check file exists on disk
         if not os.path.exists(pdf_path):
-            logging.error(f"File not found on disk for analysis: {pdf_path}")
+            logger.error("File not found on disk for analysis: %s", pdf_path)
             # Maybe DB record exists but file deleted?
             return jsonify({'error': 'PDF file consistency error - file not found on server'}), 404 # Or 500?
 
-        # 3. Extract text (using pdf_service)
-        # Future: Replace with get_text_from_pdf_with_ocr from pdf_service
-        extracted_text = extract_text_from_pdf(pdf_path)
-        if not extracted_text:
-            logging.warning(f"No text extracted from PDF ID {pdf_id}: {pdf_path}. Analysis may yield no results.")
-
-        # 4. Extract components (using pdf_service)
-        components = extract_components(extracted_text)
+        # 3. Parse once and run every requested analyzer (using analysis_service).
+        # Image-only pages are detected by the pre-scan and skip layout analysis.
+        # Future: Route needs_ocr documents to get_text_from_pdf_with_ocr from pdf_service
+        document, results = run_analyses(pdf_path, analysis_types)
 
-        # 5. Insert analysis metadata
-        analysis_type = 'component_extraction'
-        cur.execute(
-            'INSERT INTO pdf_analyses (pdf_id, analysis_type) VALUES (%s, %s) RETURNING id',
-            (pdf_id, analysis_type),
-        )
-        analysis_id = cur.fetchone()[0]
-        logging.info(f"Created analysis record ID {analysis_id} for PDF ID {pdf_id}")
-
-        # 6. Insert extracted components
-        if components:
-            # Consider moving this DB logic to db_service.py later
-            component_data = [(analysis_id, 'component_name', comp) for comp in components]
-            cur.executemany(
-                'INSERT INTO extracted_data (analysis_id, data_key, data_value) VALUES (%s, %s, %s)',
-                component_data
-            )
-            logging.info(f"Inserted {len(components)} components into extracted_data for analysis ID {analysis_id}")
-        else:
-            logging.info(f"No components to insert for analysis ID {analysis_id}")
+        # 4. Insert analysis metadata and extracted rows (one transaction for all types)
+        analyses = {}
+        for analysis_type, rows in results.items():
+            analysis_id = save_analysis_results(cur, pdf_id, analysis_type, rows, document.page_classes)
+            analyses[analysis_type] = {'analysis_id': analysis_id, 'rows': len(rows)}
 
-        # 7. Commit transaction
+        # 5. Commit transaction
         conn.commit()
         cur.close()
-        return jsonify({'message': f'Analysis complete for PDF ID {pdf_id}', 'analysis_id': analysis_id, 'components_found': len(components)})
+        response = {
+            'message': f'Analysis complete for PDF ID {pdf_id}',
+            'pages': count_page_classes(document.page_classes), # Pre-scan: text / image_only / mixed / empty
+            'needs_ocr': document.needs_ocr,
+            'analyses': analyses
+        }
+        if DEFAULT_ANALYSIS_TYPE in analyses: # Keep the original response fields for existing clients
+            response['analysis_id'] = analyses[DEFAULT_ANALYSIS_TYPE]['analysis_id']
+            response['components_found'] = analyses[DEFAULT_ANALYSIS_TYPE]['rows']
+        return jsonify(response)
 
+    except UnknownAnalysisTypeError as e:
+        logger.warning("Invalid analysis type requested for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': str(e)}), 400
     except NotFoundError as e:
-        logging.warning(f"NotFound error during analysis for PDF ID {pdf_id}: {e}")
+        logger.warning("NotFound error during analysis for PDF ID %s: %s", pdf_id, e)
         # No rollback needed as nothing was likely done yet
         return jsonify({'error': str(e)}), 404
     except psycopg2.Error as e:
-        logging.error(f"Database error during analysis for PDF ID {pdf_id}: {e}")
+        logger.error("Database error during analysis for PDF ID %s: %s", pdf_id, e)
         if conn: conn.rollback()
         return jsonify({'error': 'Database error during analysis'}), 500
     except FileNotFoundError: # Should be caught by os.path.exists, but belt-and-suspenders
-         logging.error(f"File vanished during analysis for PDF ID {pdf_id}: {pdf_path}")
+         logger.error("File vanished during analysis for PDF ID %s: %s", pdf_id, pdf_path)
          return jsonify({'error': 'PDF file disappeared during analysis'}), 500
     except Exception as e:
-        logging.error(f"Unexpected error during analysis for PDF ID {pdf_id}: {e}")
+        logger.error("Unexpected error during analysis for PDF ID %s: %s", pdf_id, e)
         if conn: conn.rollback()
         return jsonify({'error': 'An unexpected error occurred during analysis'}), 500
     finally:
@@ -141,41 +144,53 @@ def analyze_pdf(pdf_id):
             conn.close()
 
 
+def _results_payload(pdf_id, pdf_filename, analysis_type, data):
+    """JSON body shared by the results and export endpoints."""
+    payload = {
+        'pdf_id': pdf_id,
+        'pdf_filename': pdf_filename,
+        'analysis_type': analysis_type,
+        'data': data
+    }
+    if analysis_type == DEFAULT_ANALYSIS_TYPE: # Original shape, used by the UI
+        payload['components'] = data.get('component_name', [])
+    return payload
+
+
 @pdf_bp.route('/analysis_results/<int:pdf_id>', methods=['GET'])
 def get_analysis_results(pdf_id):
-    """Retrieves component extraction analysis results for a given PDF ID (JSON format)."""
+    """Retrieves analysis results for a given PDF ID (JSON format). ?analysis_type= selects the analyzer."""
+    analysis_type = request.args.get('analysis_type', DEFAULT_ANALYSIS_TYPE)
     try:
+        get_analyzer(analysis_type)
         # Use the helper function from db_service
-        pdf_filename, components, analysis_type = _get_analysis_data(pdf_id)
-        return jsonify({
-            'pdf_id': pdf_id,
-            'pdf_filename': pdf_filename,
-            'analysis_type': analysis_type,
-            'components': components
-        }), 200
+        pdf_filename, data, analysis_type = _get_analysis_data(pdf_id, analysis_type)
+        return jsonify(_results_payload(pdf_id, pdf_filename, analysis_type, data)), 200
+    except UnknownAnalysisTypeError as e:
+        logger.warning("Invalid analysis type requested for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': str(e)}), 400
     except NotFoundError as e:
-        logging.warning(f"NotFound error fetching results for PDF ID {pdf_id}: {e}")
+        logger.warning("NotFound error fetching results for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': str(e)}), 404
     except psycopg2.Error as e: # Catch DB errors propagated from helper
-        logging.error(f"Database error fetching results for PDF ID {pdf_id}: {e}")
+        logger.error("Database error fetching results for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'Database error occurred while fetching results'}), 500
     except Exception as e:
-        logging.error(f"Unexpected error fetching results for PDF ID {pdf_id}: {e}")
+        logger.error("Unexpected error fetching results for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'An internal server error occurred while fetching results'}), 500
 
 
 @pdf_bp.route('/analysis_results/<int:pdf_id>/export', methods=['GET'])
 def export_analysis_results(pdf_id):
-    """Exports analysis results as JSON or CSV file."""
+    """Exports analysis results as JSON or CSV file. ?analysis_type= selects the analyzer."""
     req_format = request.args.get('format', 'json').lower()
+    analysis_type = request.args.get('analysis_type', DEFAULT_ANALYSIS_TYPE)
     try:
-        pdf_filename, components, analysis_type = _get_analysis_data(pdf_id) # Use helper
+        get_analyzer(analysis_type)
+        pdf_filename, data, analysis_type = _get_analysis_data(pdf_id, analysis_type) # Use helper
 
         if req_format == 'json':
-            json_data = {
-                'pdf_id': pdf_id, 'pdf_filename': pdf_filename,
-                'analysis_type': analysis_type, 'components': components
-            }
+            json_data = _results_payload(pdf_id, pdf_filename, analysis_type, data)
             response = make_response(jsonify(json_data))
             response.headers['Content-Disposition'] = f'attachment; filename="analysis_{pdf_id}.json"'
             return response
@@ -183,25 +198,114 @@ def export_analysis_results(pdf_id):
         elif req_format == 'csv':
             si = io.StringIO()
             writer = csv.writer(si)
-            writer.writerow(['pdf_id', 'pdf_filename', 'analysis_type', 'component_name'])
-            if components:
-                for component in components:
+            if analysis_type == DEFAULT_ANALYSIS_TYPE:
+                # Original column layout for component extraction
+                writer.writerow(['pdf_id', 'pdf_filename', 'analysis_type', 'component_name'])
+                for component in data.get('component_name', []):
                     writer.writerow([pdf_id, pdf_filename, analysis_type, component])
+            else:
+                writer.writerow(['pdf_id', 'pdf_filename', 'analysis_type', 'data_key', 'data_value'])
+                for data_key, values in data.items():
+                    for value in values:
+                        writer.writerow([pdf_id, pdf_filename, analysis_type, data_key, value])
             output = si.getvalue()
             response = make_response(output)
             response.headers['Content-Disposition'] = f'attachment; filename="analysis_{pdf_id}.csv"'
             response.headers['Content-Type'] = 'text/csv'
             return response
         else:
-            logging.warning(f"Invalid export format requested: {req_format} for PDF ID {pdf_id}")
+            logger.warning("Invalid export format requested: %s for PDF ID %s", req_format, pdf_id)
             return jsonify({'error': f"Unsupported format: {req_format}. Use 'json' or 'csv'."}), 400
 
+    except UnknownAnalysisTypeError as e:
+        logger.warning("Invalid analysis type requested for export of PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': str(e)}), 400
     except NotFoundError as e:
-        logging.warning(f"NotFound error during export for PDF ID {pdf_id}: {e}")
+        logger.warning("NotFound error during export for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': str(e)}), 404
     except psycopg2.Error as e:
-        logging.error(f"Database error during export for PDF ID {pdf_id}: {e}")
+        logger.error("Database error during export for PDF ID %s: %s", pdf_id, e)
         return jsonify({'error': 'Database error occurred during export'}), 500
     except Exception as e:
-        logging.error(f"Unexpected error during export for PDF ID {pdf_id}: {e}")
-        return jsonify({'error': 'An internal server error occurred during export'}), 500
\ No newline at end of file
+        logger.error("Unexpected error during export for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': 'An internal server error occurred during export'}), 500
+
+
+def _page_size():
+    """Reads ?limit=, clamped to the configured maximum."""
+    limit = request.args.get('limit', current_app.config['LIST_PAGE_SIZE_DEFAULT'], type=int)
+    return max(1, min(limit, current_app.config['LIST_PAGE_SIZE_MAX']))
+
+
+@pdf_bp.route('/pdfs', methods=['GET'])
+def get_pdfs():
+    """
+    Lists uploaded PDFs, newest first, with keyset pagination.
+    Query params: limit, cursor, uploaded_from, uploaded_to, analyzed (true/false), analysis_type.
+    """
+    try:
+        cursor = request.args.get('cursor')
+        analysis_type = request.args.get('analysis_type')
+        analyzed = parse_bool_arg(request.args.get('analyzed'))
+        if analysis_type is not None:
+            get_analyzer(analysis_type)
+            if analyzed is None:
+                analyzed = True # analysis_type alone means "analyzed with this type"
+        items, has_more = list_pdfs(
+            _page_size(),
+            after=decode_cursor(cursor) if cursor else None,
+            uploaded_from=parse_datetime_arg(request.args.get('uploaded_from')),
+            uploaded_to=parse_datetime_arg(request.args.get('uploaded_to')),
+            analyzed=analyzed,
+            analysis_type=analysis_type,
+        )
+        next_cursor = encode_cursor(items[-1]['upload_date'], items[-1]['pdf_id']) if has_more else None
+        for item in items:
+            item['upload_date'] = item['upload_date'].isoformat()
+        return jsonify({'items': items, 'next_cursor': next_cursor}), 200
+    except ValueError as e: # Bad cursor, date, boolean or analysis_type
+        logger.warning("Invalid PDF listing request: %s", e)
+        return jsonify({'error': str(e)}), 400
+    except psycopg2.Error as e:
+        logger.error("Database error listing PDFs: %s", e)
+        return jsonify({'error': 'Database error occurred while listing PDFs'}), 500
+    except Exception as e:
+        logger.error("Unexpected error listing PDFs: %s", e)
+        return jsonify({'error': 'An internal server error occurred while listing PDFs'}), 500
+
+
+@pdf_bp.route('/pdfs/<int:pdf_id>/analyses', methods=['GET'])
+def get_pdf_analyses(pdf_id):
+    """
+    Lists the analyses of one PDF, newest first, with keyset pagination.
+    Query params: limit, cursor, analyzed_from, analyzed_to, analysis_type.
+    """
+    try:
+        cursor = request.args.get('cursor')
+        analysis_type = request.args.get('analysis_type')
+        if analysis_type is not None:
+            get_analyzer(analysis_type)
+        items, has_more = list_analyses(
+            pdf_id,
+            _page_size(),
+            after=decode_cursor(cursor) if cursor else None,
+            analyzed_from=parse_datetime_arg(request.args.get('analyzed_from')),
+            analyzed_to=parse_datetime_arg(request.args.get('analyzed_to')),
+            analysis_type=analysis_type,
+        )
+        next_cursor = encode_cursor(items[-1]['analysis_date'], items[-1]['analysis_id']) if has_more else None
+        for item in items:
+            item['analysis_date'] = item['analysis_date'].isoformat()
+        return jsonify({'pdf_id': pdf_id, 'items': items, 'next_cursor': next_cursor}), 200
+    except NotFoundError as e:
+        logger.warning("NotFound error listing analyses for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e: # Bad cursor, date or analysis_type
+        logger.warning("Invalid analysis listing request for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': str(e)}), 400
+    except psycopg2.Error as e:
+        logger.error("Database error listing analyses for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': 'Database error occurred while listing analyses'}), 500
+    except Exception as e:
+        logger.error("Unexpected error listing analyses for PDF ID %s: %s", pdf_id, e)
+        return jsonify({'error': 'An internal server error occurred while listing analyses'}), 500
@@ -0,0 +1,84 @@
+import logging
+from app.services.pdf_service import parse_pdf, extract_components
+from app.utils.exceptions import UnknownAnalysisTypeError
+
+logger = logging.getLogger(__name__)
+
+# Analyzer registry.
+# An analyzer is a function taking a ParsedDocument and returning a list of
+# (data_key, data_value) rows for extracted_data. It declares what part of the
+# parsed document it consumes so run_analyses() knows how much of the parse to
+# keep, and which data_keys it emits. One run parses the PDF once and fans the
+# ParsedDocument out to every requested analyzer.
+
+CONSUMES_TEXT = 'text'     # ParsedDocument.text
+CONSUMES_PAGES = 'pages'   # ParsedDocument.page_texts
+CONSUMES_LAYOUT = 'layout' # ParsedDocument.layouts (pdfminer LTPage objects)
+
+DEFAULT_ANALYSIS_TYPE = 'component_extraction'
+
+ANALYZERS = {}
+
+class Analyzer:
+    """A registered analysis: its name, what it consumes and what it emits."""
+    def __init__(self, name, func, consumes, emits):
+        self.name = name
+        self.func = func
+        self.consumes = frozenset(consumes)
+        self.emits = frozenset(emits)
+
+    def __call__(self, document):
+        return self.func(document)
+
+def register_analyzer(name, consumes, emits):
+    """Decorator registering an analyzer function under `name` (the analysis_type)."""
+    def decorator(func):
+        if name in ANALYZERS:
+            raise ValueError(f"Analyzer '{name}' is already registered.")
+        ANALYZERS[name] = Analyzer(name, func, consumes, emits)
+        return func
+    return decorator
+
+def get_analyzer(name):
+    """Returns the analyzer registered for `name`, or raises UnknownAnalysisTypeError."""
+    try:
+        return ANALYZERS[name]
+    except KeyError:
+        raise UnknownAnalysisTypeError(
+            f"Unknown analysis_type: {name}. Available: {', '.join(sorted(ANALYZERS))}"
+        ) from None
+
+def run_analyses(pdf_path, analysis_types):
+    """
+    Parses the PDF once and runs every requested analyzer over the result.
+    Returns (document, {analysis_type: [(data_key, data_value), ...]}).
+    """
+    analyzers = [get_analyzer(name) for name in dict.fromkeys(analysis_types)]
+    keep_layout = any(CONSUMES_LAYOUT in analyzer.consumes for analyzer in analyzers)
+    document = parse_pdf(pdf_path, keep_layout=keep_layout)
+    if not document.page_count:
+        logger.warning("No pages parsed from %s. Analysis may yield no results.", pdf_path)
+    elif not document.has_text_layer:
+        logger.warning("No page of %s has a text layer (%s pages). Analysis may yield no results.", pdf_path, document.page_count)
+
+    results = {}
+    for analyzer in analyzers:
+        rows = analyzer(document)
+        logger.info("Analyzer '%s' produced %s rows for %s", analyzer.name, len(rows), pdf_path)
+        results[analyzer.name] = rows
+    return document, results
+
+
+# --- Built-in analyzers ---
+
+@register_analyzer('component_extraction', consumes={CONSUMES_TEXT}, emits={'component_name'})
+def component_extraction(document):
+    """Regex-based machine component extraction (see pdf_service.extract_components)."""
+    return [('component_name', comp) for comp in extract_components(document.text)]
+
+@register_analyzer('page_statistics', consumes={CONSUMES_PAGES}, emits={'page_count', 'page_chars'})
+def page_statistics(document):
+    """Page count plus the number of extracted characters on each page, in page order."""
+    rows = [('page_count', str(document.page_count))]
+    rows.extend(('page_chars', str(len(page))) for page in document.page_texts)
+    return rows
@@ -1,71 +1,288 @@
+import io
 import psycopg2
 import logging
+from psycopg2.extras import Json
 from flask import current_app # Use current_app to access config
 from app.utils.exceptions import NotFoundError # Import custom exception
 
+logger = logging.getLogger(__name__)
+
 def get_db_connection():
     """Establishes a connection to the PostgreSQL database using app config."""
     conn = None
     db_url = current_app.config['DATABASE_URL']
     if not db_url:
          # This should ideally be caught during config loading, but double-check
-         logging.error("DATABASE_URL is not configured.")
+         logger.error("DATABASE_URL is not configured.")
          raise ValueError("Database URL not configured.")
     try:
         conn = psycopg2.connect(db_url)
-        logging.debug("Database connection established.")
+        logger.debug("Database connection established.")
         return conn
     except psycopg2.Error as e:
-        logging.error(f"Error connecting to database at {db_url[:db_url.find('@')] + '@...' if '@' in db_url else db_url}: {e}") # Avoid logging password
+        logger.error("Error connecting to database at %s: %s", db_url[:db_url.find('@')] + '@...' if '@' in db_url else db_url, e) # Avoid logging password
         raise # Propagate the error
 
-def _get_analysis_data(pdf_id: int):
+def _get_analysis_data(pdf_id: int, analysis_type: str = 'component_extraction'):
     """
-    Helper function to retrieve filename and component analysis results for a PDF ID.
+    Helper function to retrieve filename and the latest analysis result of one type for a PDF ID.
+    Reads the analysis_summaries read model (a single primary-key lookup); only
+    falls back to pdfs when there is no summary, to tell "not analyzed" from "not found".
     Raises NotFoundError if the PDF doesn't exist.
-    Returns tuple (pdf_filename, components_list, analysis_type).
+    Returns tuple (pdf_filename, data, analysis_type) where data maps each
+    data_key to its list of data_values in insertion order.
     """
     conn = None
-    logging.debug(f"Attempting to fetch analysis data for pdf_id: {pdf_id}")
+    logger.debug("Attempting to fetch %s data for pdf_id: %s", analysis_type, pdf_id)
     try:
         conn = get_db_connection()
         cur = conn.cursor()
 
-        # 1. Get PDF filename
-        cur.execute('SELECT filename FROM pdfs WHERE id = %s', (pdf_id,))
-        pdf_record = cur.fetchone()
-        if pdf_record is None:
-            logging.warning(f"PDF with id {pdf_id} not found in database.")
-            raise NotFoundError(f"PDF with id {pdf_id} not found")
-        pdf_filename = pdf_record[0]
-        logging.info(f"Found PDF: {pdf_filename} (ID: {pdf_id})")
-
-        # 2. Get associated components
-        analysis_type = 'component_extraction' # Keep hardcoded for now
         cur.execute(
-            """
-            SELECT ed.data_value
-            FROM extracted_data ed
-            JOIN pdf_analyses pa ON ed.analysis_id = pa.id
-            WHERE pa.pdf_id = %s AND pa.analysis_type = %s AND ed.data_key = %s
-            ORDER BY ed.id ASC
-            """,
-            (pdf_id, analysis_type, 'component_name')
+            'SELECT pdf_filename, result FROM analysis_summaries WHERE pdf_id = %s AND analysis_type = %s',
+            (pdf_id, analysis_type)
         )
-        results = cur.fetchall()
-        components = [row[0] for row in results]
-        logging.info(f"Found {len(components)} components for PDF ID {pdf_id}")
+        summary = cur.fetchone()
+        if summary is not None:
+            pdf_filename, data = summary
+        else:
+            cur.execute('SELECT filename FROM pdfs WHERE id = %s', (pdf_id,))
+            pdf_record = cur.fetchone()
+            if pdf_record is None:
+                logger.warning("PDF with id %s not found in database.", pdf_id)
+                raise NotFoundError(f"PDF with id {pdf_id} not found")
+            pdf_filename, data = pdf_record[0], {}
+        logger.info("Found %s %s rows for PDF ID %s (%s)", sum(len(v) for v in data.values()), analysis_type, pdf_id, pdf_filename)
 
         cur.close()
-        return pdf_filename, components, analysis_type
+        return pdf_filename, data, analysis_type
 
     except psycopg2.Error as db_err:
-        logging.error(f"Database error fetching analysis data for PDF ID {pdf_id}: {db_err}")
+        logger.error("Database error fetching analysis data for PDF ID %s: %s", pdf_id, db_err)
         raise # Re-raise database errors
     finally:
         if conn:
             conn.close()
-            logging.debug("Database connection closed.")
+            logger.debug("Database connection closed.")
+
+def count_page_classes(page_classes):
+    """Summarizes a per-page class list as {class: page_count}; None if the analysis predates the pre-scan."""
+    if page_classes is None:
+        return None
+    counts = {}
+    for page_class in page_classes:
+        counts[page_class] = counts.get(page_class, 0) + 1
+    return counts
+
+def rows_to_result(rows):
+    """Groups (data_key, data_value) rows into the {data_key: [data_value, ...]} summary document."""
+    result = {}
+    for data_key, data_value in rows:
+        result.setdefault(data_key, []).append(data_value)
+    return result
+
+def save_analysis_results(cur, pdf_id, analysis_type, rows, page_classes=None):
+    """
+    Inserts one pdf_analyses record (with the pre-scan class of each page) and its
+    (data_key, data_value) rows using the caller's cursor; the caller owns the
+    transaction. Returns the new analysis ID.
+    """
+    cur.execute(
+        'INSERT INTO pdf_analyses (pdf_id, analysis_type, page_classes) VALUES (%s, %s, %s) RETURNING id',
+        (pdf_id, analysis_type, Json(page_classes) if page_classes is not None else None),
+    )
+    analysis_id = cur.fetchone()[0]
+    logger.info("Created analysis record ID %s (%s) for PDF ID %s", analysis_id, analysis_type, pdf_id)
+    if rows:
+        cur.executemany(
+            'INSERT INTO extracted_data (analysis_id, data_key, data_value) VALUES (%s, %s, %s)',
+            [(analysis_id, data_key, data_value) for data_key, data_value in rows]
+        )
+        logger.info("Inserted %s rows into extracted_data for analysis ID %s", len(rows), analysis_id)
+    else:
+        logger.info("No rows to insert for analysis ID %s", analysis_id)
+    upsert_analysis_summary(cur, analysis_id, rows_to_result(rows))
+    return analysis_id
+
+def upsert_analysis_summary(cur, analysis_id, result):
+    """
+    Points the (pdf_id, analysis_type) summary at `analysis_id` with `result`.
+    Never replaces a summary that already points at a newer analysis.
+    """
+    cur.execute(
+        """
+        INSERT INTO analysis_summaries (pdf_id, analysis_type, analysis_id, pdf_filename, analysis_date, result)
+        SELECT pa.pdf_id, pa.analysis_type, pa.id, p.filename, pa.analysis_date, %s
+        FROM pdf_analyses pa JOIN pdfs p ON p.id = pa.pdf_id
+        WHERE pa.id = %s
+        ON CONFLICT (pdf_id, analysis_type) DO UPDATE
+        SET analysis_id = EXCLUDED.analysis_id, pdf_filename = EXCLUDED.pdf_filename,
+            analysis_date = EXCLUDED.analysis_date, result = EXCLUDED.result
+        WHERE analysis_summaries.analysis_id <= EXCLUDED.analysis_id
+        """,
+        (Json(result), analysis_id)
+    )
+
+def list_pdfs(limit, after=None, uploaded_from=None, uploaded_to=None, analyzed=None, analysis_type=None):
+    """
+    Keyset-paginated listing of uploaded PDFs, newest first.
+    `after` is the (upload_date, id) of the last row of the previous page.
+    `analyzed` filters on whether a summary exists (optionally for `analysis_type`).
+    Returns (items, has_more); each item carries per-type counts of extracted rows
+    computed from analysis_summaries, never the full results.
+    """
+    clauses, params = [], []
+    if uploaded_from is not None:
+        clauses.append("p.upload_date >= %s")
+        params.append(uploaded_from)
+    if uploaded_to is not None:
+        clauses.append("p.upload_date < %s")
+        params.append(uploaded_to)
+    if analyzed is not None:
+        exists = "EXISTS (SELECT 1 FROM analysis_summaries s WHERE s.pdf_id = p.id"
+        if analysis_type is not None:
+            exists += " AND s.analysis_type = %s"
+            params.append(analysis_type)
+        clauses.append(("" if analyzed else "NOT ") + exists + ")")
+    if after is not None:
+        clauses.append("(p.upload_date, p.id) < (%s, %s)")
+        params.extend(after)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT p.id, p.filename, p.upload_date,
+                   COALESCE((
+                       SELECT jsonb_object_agg(s.analysis_type, jsonb_build_object(
+                           'analysis_id', s.analysis_id,
+                           'analysis_date', s.analysis_date,
+                           'counts', (SELECT COALESCE(jsonb_object_agg(e.key, jsonb_array_length(e.value)), '{{}}'::jsonb)
+                                      FROM jsonb_each(s.result) e)))
+                       FROM analysis_summaries s WHERE s.pdf_id = p.id
+                   ), '{{}}'::jsonb) AS analyses
+            FROM pdfs p
+            {where}
+            ORDER BY p.upload_date DESC, p.id DESC
+            LIMIT %s
+            """,
+            params + [limit + 1]
+        )
+        rows = cur.fetchall()
+        cur.close()
+        items = [
+            {'pdf_id': pdf_id, 'filename': filename, 'upload_date': upload_date, 'analyses': analyses}
+            for pdf_id, filename, upload_date, analyses in rows[:limit]
+        ]
+        return items, len(rows) > limit
+    except psycopg2.Error as db_err:
+        logger.error("Database error listing PDFs: %s", db_err)
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+def list_analyses(pdf_id, limit, after=None, analyzed_from=None, analyzed_to=None, analysis_type=None):
+    """
+    Keyset-paginated listing of the analyses of one PDF, newest first.
+    `after` is the (analysis_date, id) of the last row of the previous page.
+    Raises NotFoundError if the PDF doesn't exist. Returns (items, has_more).
+    """
+    clauses, params = ["pa.pdf_id = %s"], [pdf_id]
+    if analyzed_from is not None:
+        clauses.append("pa.analysis_date >= %s")
+        params.append(analyzed_from)
+    if analyzed_to is not None:
+        clauses.append("pa.analysis_date < %s")
+        params.append(analyzed_to)
+    if analysis_type is not None:
+        clauses.append("pa.analysis_type = %s")
+        params.append(analysis_type)
+    if after is not None:
+        clauses.append("(pa.analysis_date, pa.id) < (%s, %s)")
+        params.extend(after)
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('SELECT 1 FROM pdfs WHERE id = %s', (pdf_id,))
+        if cur.fetchone() is None:
+            raise NotFoundError(f"PDF with id {pdf_id} not found")
+        cur.execute(
+            f"""
+            SELECT pa.id, pa.analysis_type, pa.analysis_date,
+                   -- extracted_data rows carry their analysis' analysis_date (same transaction),
+                   -- so matching on it prunes the count to one partition
+                   (SELECT count(*) FROM extracted_data ed
+                    WHERE ed.analysis_id = pa.id AND ed.analysis_date = pa.analysis_date) AS row_count,
+                   EXISTS (SELECT 1 FROM analysis_summaries s WHERE s.analysis_id = pa.id) AS is_latest,
+                   pa.page_classes
+            FROM pdf_analyses pa
+            WHERE {" AND ".join(clauses)}
+            ORDER BY pa.analysis_date DESC, pa.id DESC
+            LIMIT %s
+            """,
+            params + [limit + 1]
+        )
+        rows = cur.fetchall()
+        cur.close()
+        items = [
+            {'analysis_id': analysis_id, 'analysis_type': a_type, 'analysis_date': analysis_date,
+             'rows': row_count, 'is_latest': is_latest, 'pages': count_page_classes(page_classes)}
+            for analysis_id, a_type, analysis_date, row_count, is_latest, page_classes in rows[:limit]
+        ]
+        return items, len(rows) > limit
+    except psycopg2.Error as db_err:
+        logger.error("Database error listing analyses for PDF ID %s: %s", pdf_id, db_err)
+        raise
+    finally:
+        if conn:
+            conn.close()
 
-# --- Add functions here later for saving analysis data too ---
-# def save_analysis_results(pdf_id, analysis_type, components): ...
\ No newline at end of file
+def reserve_ids(cur, table, count):
+    """
+    Reserves `count` values from the SERIAL sequence behind `table`.id.
+    Lets bulk loaders assign primary keys up front so child rows can be
+    written with COPY without a RETURNING round trip per row.
+    """
+    if count <= 0:
+        return []
+    cur.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        (table, count)
+    )
+    return [row[0] for row in cur.fetchall()]
+
+def _copy_csv_field(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def copy_rows(cur, table, columns, rows):
+    """
+    Bulk-loads `rows` into `table` with COPY ... FROM STDIN (CSV format).
+    `table` and `columns` are trusted identifiers, never user input.
+    None is written as an unquoted \\N (the declared NULL marker) and every
+    string is quoted, so '' and a literal '\\N' stay strings instead of becoming NULL.
+    Returns the number of rows written.
+    """
+    si = io.StringIO()
+    count = 0
+    for row in rows:
+        si.write(",".join(_copy_csv_field(value) for value in row))
+        si.write("\n")
+        count += 1
+    if not count:
+        return 0
+    si.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        si
+    )
+    return count
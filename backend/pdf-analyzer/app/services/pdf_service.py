@@ -1,17 +1,173 @@
 import re
 import logging
-import pdfminer.high_level # type: ignore
+from pdfminer.layout import LAParams, LTContainer, LTText, LTTextBox # type: ignore
+from pdfminer.converter import PDFPageAggregator # type: ignore
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter # type: ignore
+from pdfminer.pdfpage import PDFPage # type: ignore
+from pdfminer.pdftypes import resolve1, PDFObjRef, PDFStream # type: ignore
+from pdfminer.psparser import LIT # type: ignore
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts text content from a PDF file using pdfminer."""
-    logging.debug(f"Extracting text from: {pdf_path}")
+logger = logging.getLogger(__name__)
+
+# --- Page pre-scan ---
+# Cheap per-page classification from the page's resources and raw content
+# stream, without running layout analysis. Lets scanned (image-only) pages skip
+# the expensive text path and be flagged for OCR.
+
+PAGE_TEXT = 'text'
+PAGE_IMAGE_ONLY = 'image_only'
+PAGE_MIXED = 'mixed'
+PAGE_EMPTY = 'empty'
+TEXT_LAYER_CLASSES = (PAGE_TEXT, PAGE_MIXED)
+
+# Text operators and inline images (BI), as standalone tokens. The pre-scan may
+# over-report text but must never miss it, so besides the text-showing operators
+# (Tj, TJ, and ' and " right after their string operand) a font selection (Tf)
+# also counts: a BT...ET block that selects a font is treated as a text layer.
+_TEXT_OPERATOR_RE = re.compile(rb'(?<![A-Za-z0-9_])T[jJf](?![A-Za-z0-9_])|[)>]\s*[\'"]')
+_INLINE_IMAGE_RE = re.compile(rb'(?<![A-Za-z0-9_])BI(?![A-Za-z0-9_])')
+_XOBJECT_DO_RE = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+Do(?![A-Za-z0-9_])')
+_LIT_IMAGE = LIT('Image')
+_LIT_FORM = LIT('Form')
+
+def _stream_data(streams):
+    data = []
+    for stream in streams:
+        stream = resolve1(stream)
+        if isinstance(stream, PDFStream):
+            data.append(stream.get_data())
+    return b"\n".join(data)
+
+def _scan_content(resources, content, visited=None):
+    """
+    Returns (has_text, has_image) for one content stream and its form XObjects,
+    however deeply nested. `visited` holds the forms already scanned for this
+    page, so shared forms are scanned once and reference cycles terminate.
+    """
+    if visited is None:
+        visited = set()
+    has_text = bool(_TEXT_OPERATOR_RE.search(content))
+    has_image = bool(_INLINE_IMAGE_RE.search(content))
+    xobjects = resolve1((resources or {}).get('XObject')) or {}
+    for name in set(_XOBJECT_DO_RE.findall(content)):
+        ref = xobjects.get(name.decode('latin-1'))
+        xobject = resolve1(ref)
+        if not isinstance(xobject, PDFStream):
+            continue
+        subtype = xobject.get('Subtype')
+        if subtype is _LIT_IMAGE:
+            has_image = True
+        elif subtype is _LIT_FORM:
+            key = ref.objid if isinstance(ref, PDFObjRef) else id(xobject)
+            if key in visited:
+                continue
+            visited.add(key)
+            form_text, form_image = _scan_content(resolve1(xobject.get('Resources')) or resources,
+                                                  xobject.get_data(), visited)
+            has_text = has_text or form_text
+            has_image = has_image or form_image
+        if has_text and has_image:
+            break
+    return has_text, has_image
+
+def classify_page(page):
+    """Classifies a pdfminer PDFPage as text, image_only, mixed or empty."""
+    try:
+        resources = resolve1(page.resources) or {}
+        has_text, has_image = _scan_content(resources, _stream_data(page.contents))
+    except Exception as e:
+        # Unreadable stream: let the layout path decide rather than dropping the page
+        logger.warning("Pre-scan failed for page %s: %s", getattr(page, 'pageid', '?'), e)
+        return PAGE_TEXT
+    if has_text and has_image:
+        return PAGE_MIXED
+    if has_text:
+        return PAGE_TEXT
+    if has_image:
+        return PAGE_IMAGE_ONLY
+    return PAGE_EMPTY
+
+
+class ParsedDocument:
+    """
+    Result of parsing a PDF once with pdfminer, shared by every analyzer in a run.
+    `page_classes` holds the pre-scan class of every page; `page_texts` holds one
+    string per page ('' for pages without a text layer); `layouts` holds the
+    pdfminer LTPage objects (None for skipped pages) and is only populated when
+    parse_pdf(keep_layout=True).
+    """
+    def __init__(self, path, page_texts, layouts=None, page_classes=None):
+        self.path = path
+        self.page_texts = page_texts
+        self.layouts = layouts
+        self.page_classes = page_classes if page_classes is not None else []
+
+    @property
+    def text(self):
+        """Whole-document text, pages separated by form feeds like pdfminer's extract_text."""
+        return "".join(page + "\f" for page in self.page_texts)
+
+    @property
+    def page_count(self):
+        return len(self.page_texts)
+
+    @property
+    def has_text_layer(self):
+        return any(page_class in TEXT_LAYER_CLASSES for page_class in self.page_classes)
+
+    @property
+    def needs_ocr(self):
+        """True if any page is a scan without a text layer."""
+        return PAGE_IMAGE_ONLY in self.page_classes
+
+def _collect_text(item, chunks):
+    # Same walk as pdfminer's TextConverter (used by extract_text), so text
+    # nested in figures (form XObjects) is kept and every text box ends in "\n".
+    if isinstance(item, LTContainer):
+        for child in item:
+            _collect_text(child, chunks)
+    elif isinstance(item, LTText):
+        chunks.append(item.get_text())
+    if isinstance(item, LTTextBox):
+        chunks.append("\n")
+
+def parse_pdf(pdf_path, keep_layout=False):
+    """
+    Pre-scans every page and runs pdfminer layout analysis only on pages with a
+    text layer; image-only and empty pages are skipped. Layout objects are
+    discarded page by page unless keep_layout is set.
+    Returns an empty document on failure.
+    """
+    logger.debug("Parsing PDF: %s", pdf_path)
+    page_texts = []
+    page_classes = []
+    layouts = [] if keep_layout else None
     try:
-        text = pdfminer.high_level.extract_text(pdf_path)
-        logging.info(f"Text extracted successfully from {pdf_path} (length: {len(text)}).")
-        return text
+        with open(pdf_path, 'rb') as fp:
+            resource_manager = PDFResourceManager(caching=True)
+            device = PDFPageAggregator(resource_manager, laparams=LAParams())
+            interpreter = PDFPageInterpreter(resource_manager, device)
+            for page in PDFPage.get_pages(fp):
+                page_class = classify_page(page)
+                page_classes.append(page_class)
+                if page_class not in TEXT_LAYER_CLASSES:
+                    page_texts.append("")
+                    if keep_layout:
+                        layouts.append(None)
+                    continue
+                interpreter.process_page(page)
+                page_layout = device.get_result()
+                chunks = []
+                _collect_text(page_layout, chunks)
+                page_texts.append("".join(chunks))
+                if keep_layout:
+                    layouts.append(page_layout)
+        skipped = sum(1 for page_class in page_classes if page_class not in TEXT_LAYER_CLASSES)
+        logger.info("Parsed %s pages from %s (%s skipped without a text layer).", len(page_texts), pdf_path, skipped)
+        return ParsedDocument(pdf_path, page_texts, layouts, page_classes)
     except Exception as e:
-        logging.error(f"Error extracting text from {pdf_path}: {e}")
-        return ""
+        logger.error("Error parsing %s: %s", pdf_path, e)
+        return ParsedDocument(pdf_path, [], [] if keep_layout else None)
 
 def extract_components(text):
     """Extracts predefined components from text using regex."""
@@ -24,9 +180,9 @@ def extract_components(text):
         r"tool changer\s*([a-zA-Z0-9\-\s]+)",
     ]
     components = []
-    logging.debug("Starting component extraction from text.")
+    logger.debug("Starting component extraction from text.")
     if not text:
-        logging.warning("Cannot extract components, input text is empty.")
+        logger.warning("Cannot extract components, input text is empty.")
         return components
 
     for pattern in component_patterns:
@@ -34,12 +190,12 @@ def extract_components(text):
             matches = re.findall(pattern, text, re.IGNORECASE)
             components.extend([match.strip() for match in matches])
         except Exception as e:
-            logging.error(f"Error applying regex pattern '{pattern}': {e}")
+            logger.error("Error applying regex pattern '%s': %s", pattern, e)
             # Decide if you want to continue with other patterns or stop
 
     unique_components = list(set(components))
-    logging.info(f"Component extraction found {len(unique_components)} unique components.")
-    logging.debug(f"Extracted components: {unique_components}")
+    logger.info("Component extraction found %s unique components.", len(unique_components))
+    logger.debug("Extracted components: %s", unique_components)
     return unique_components
 
 # --- Add OCR function here later ---
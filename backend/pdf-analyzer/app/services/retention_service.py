@@ -0,0 +1,389 @@
+import time
+import logging
+from datetime import datetime, timedelta
+import psycopg2
+from psycopg2 import sql, errors
+from app.services.db_service import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Retention for analysis history.
+# An analysis is kept if it is one of the last `keep_last` analyses for its
+# (pdf_id, analysis_type) OR younger than `max_age_days`. Everything else is
+# expired and removed by run_compaction(), which works in short transactions
+# (one batch of analyses at a time, with a lock_timeout) so it never holds
+# long locks on the tables the API writes to.
+
+PARTITION_PREFIX = 'extracted_data_p'
+LIVE_MONTH_MARGIN = timedelta(days=1)
+
+RANKED_ANALYSES_SQL = """
+    SELECT id, analysis_date,
+           row_number() OVER (PARTITION BY pdf_id, analysis_type
+                              ORDER BY analysis_date DESC, id DESC) AS rn
+    FROM pdf_analyses
+"""
+
+
+def _month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+def _add_months(dt, months):
+    month_index = dt.year * 12 + dt.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+def _partition_name(month):
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+def _expired_condition(keep_last, cutoff):
+    """Builds the WHERE clause (over RANKED_ANALYSES_SQL columns) selecting expired analyses."""
+    if keep_last is None and cutoff is None:
+        raise ValueError("Retention policy needs keep_last and/or max_age_days.")
+    clauses, params = [], {}
+    if keep_last is not None:
+        clauses.append("rn > %(keep_last)s")
+        params['keep_last'] = keep_last
+    if cutoff is not None:
+        clauses.append("analysis_date < %(cutoff)s")
+        params['cutoff'] = cutoff
+    return " AND ".join(clauses), params
+
+
+def _partition_month(name):
+    return datetime.strptime(name[len(PARTITION_PREFIX):], '%Y%m')
+
+def _is_live_month(lower, upper, now):
+    # Rows for this month may still arrive (analysis_date comes from the database clock)
+    return lower - LIVE_MONTH_MARGIN <= now < upper + LIVE_MONTH_MARGIN
+
+def _months_to_partition(first, last, now):
+    """Current and upcoming months (up to `last`) first, then older months newest to oldest."""
+    current = _month_start(now)
+    months = []
+    month = current
+    while month <= last:
+        months.append(month)
+        month = _add_months(month, 1)
+    month = _add_months(current, -1)
+    while month >= first:
+        months.append(month)
+        month = _add_months(month, -1)
+    return months
+
+def _pending_partitions(cur):
+    """Names of partition tables created by an earlier run whose attach didn't complete."""
+    cur.execute(
+        """
+        SELECT c.relname FROM pg_class c
+        WHERE c.relkind = 'r' AND c.relname ~ %s
+          AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)
+        """,
+        (f"^{PARTITION_PREFIX}[0-9]{{6}}$",)
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def ensure_partitions(conn, months_ahead, batch_size, lock_timeout):
+    """
+    Creates monthly extracted_data partitions up to `months_ahead` months from now
+    and for every older month still in the default partition. The current and
+    upcoming months go first so live inserts stop landing in the default
+    partition; rows already sitting there for a new month are moved into it,
+    `batch_size` rows per transaction. A partition whose attach hits the lock
+    timeout is left pending and finished by the next run.
+    Returns the list of partition names created.
+    """
+    cur = conn.cursor()
+    created = []
+    try:
+        cur.execute("SELECT min(analysis_date) FROM extracted_data_default")
+        oldest_default = cur.fetchone()[0]
+        pending = _pending_partitions(cur)
+        conn.rollback()
+
+        now = datetime.now()
+        candidates = [now] + ([oldest_default] if oldest_default else [])
+        candidates += [_partition_month(name) for name in pending]
+        last = _add_months(_month_start(now), months_ahead)
+
+        for month in _months_to_partition(_month_start(min(candidates)), last, now):
+            name = _partition_name(month)
+            cur.execute("SELECT to_regclass(%s)", (name,))
+            exists = cur.fetchone()[0] is not None
+            conn.rollback()
+            if exists and name not in pending:
+                continue
+            try:
+                _create_partition(conn, cur, name, month, _add_months(month, 1),
+                                  not exists, batch_size, lock_timeout)
+            except errors.LockNotAvailable:
+                conn.rollback()
+                logger.warning("Lock timeout attaching partition %s; the next run finishes it", name)
+            else:
+                created.append(name)
+                logger.info("Created partition %s", name)
+        return created
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+def _create_partition(conn, cur, name, lower, upper, create, batch_size, lock_timeout):
+    # A partition cannot be created while the default partition holds rows in its
+    # range, so build it standalone, move those rows over, then attach it.
+    # Until the attach commits, moved rows are not visible through extracted_data
+    # and find_expired_analyses() leaves their analyses alone. The table gets the
+    # foreign key up front, so no orphan can get in and ATTACH reuses it as is.
+    table = sql.Identifier(name)
+    bound = sql.Identifier(f"{name}_bound")
+    excluded = sql.Identifier(f"{name}_excluded")
+    move_sql = sql.SQL("""
+        WITH moved AS (
+            DELETE FROM extracted_data_default
+            WHERE ctid IN (
+                SELECT ctid FROM extracted_data_default
+                WHERE analysis_date >= %(lower)s AND analysis_date < %(upper)s
+                {limit}
+            )
+            RETURNING id, analysis_id, data_key, data_value, analysis_date
+        )
+        INSERT INTO {table} (id, analysis_id, data_key, data_value, analysis_date)
+        SELECT id, analysis_id, data_key, data_value, analysis_date FROM moved
+    """)
+    params = {'lower': lower, 'upper': upper, 'limit': batch_size}
+
+    def move_batches():
+        total = 0
+        moved = batch_size
+        while moved >= batch_size:
+            cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+            cur.execute(move_sql.format(table=table, limit=sql.SQL("LIMIT %(limit)s")), params)
+            moved = cur.rowcount
+            conn.commit()
+            total += moved
+        return total
+
+    if create:
+        cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+        cur.execute(
+            sql.SQL("CREATE TABLE {} (LIKE extracted_data INCLUDING DEFAULTS, "
+                    "FOREIGN KEY (analysis_id) REFERENCES pdf_analyses (id))").format(table)
+        )
+        conn.commit()
+
+    total = move_batches()
+
+    # A valid CHECK matching the bound lets ATTACH skip scanning the new partition.
+    cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+    cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT IF EXISTS {}").format(table, bound))
+    cur.execute(
+        sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} CHECK (analysis_date IS NOT NULL AND analysis_date >= %s AND analysis_date < %s)")
+           .format(table, bound),
+        (lower, upper)
+    )
+    conn.commit()
+
+    if _is_live_month(lower, upper, datetime.now()):
+        # Rows for this month are still being inserted, so the default partition
+        # can't be constrained to exclude it. Move the rows that arrived since the
+        # last batch under a lock and attach in the same transaction; ATTACH then
+        # scans the default partition, which normally holds only those stragglers.
+        cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+        cur.execute("LOCK TABLE extracted_data_default IN ACCESS EXCLUSIVE MODE")
+        cur.execute(move_sql.format(table=table, limit=sql.SQL("")), params)
+        total += cur.rowcount
+    else:
+        # No new rows can arrive for this month. A validated CHECK on the default
+        # partition excluding the range lets ATTACH skip its scan of the default
+        # partition; VALIDATE only takes a SHARE UPDATE EXCLUSIVE lock, so the
+        # scan doesn't block inserts.
+        cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+        cur.execute(sql.SQL("ALTER TABLE extracted_data_default DROP CONSTRAINT IF EXISTS {}").format(excluded))
+        cur.execute(
+            sql.SQL("ALTER TABLE extracted_data_default ADD CONSTRAINT {} CHECK (analysis_date < %s OR analysis_date >= %s) NOT VALID")
+               .format(excluded),
+            (lower, upper)
+        )
+        conn.commit()
+        total += move_batches() # Anything that slipped in before the constraint
+        cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+        cur.execute(sql.SQL("ALTER TABLE extracted_data_default VALIDATE CONSTRAINT {}").format(excluded))
+        conn.commit()
+        cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+
+    cur.execute(
+        sql.SQL("ALTER TABLE extracted_data ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)").format(table),
+        (lower, upper)
+    )
+    cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(table, bound))
+    cur.execute(sql.SQL("ALTER TABLE extracted_data_default DROP CONSTRAINT IF EXISTS {}").format(excluded))
+    conn.commit()
+    if total:
+        logger.info("Moved %s rows from extracted_data_default into %s", total, name)
+
+
+def find_expired_analyses(conn, keep_last, cutoff):
+    """
+    Returns the ids of all analyses outside the retention policy, oldest first.
+    Analyses from a month whose partition is still pending are left out: their
+    extracted_data rows sit in the unattached table, out of reach of the delete.
+    """
+    condition, params = _expired_condition(keep_last, cutoff)
+    cur = conn.cursor()
+    try:
+        params['pending_months'] = sorted(_partition_month(name) for name in _pending_partitions(cur))
+        if params['pending_months']:
+            logger.warning("Partitions pending attach (%s); their analyses are kept until the next run",
+                           ", ".join(_partition_name(month) for month in params['pending_months']))
+        cur.execute(
+            f"""
+            SELECT id FROM ({RANKED_ANALYSES_SQL}) ranked
+            WHERE {condition} AND date_trunc('month', analysis_date) <> ALL(%(pending_months)s::timestamp[])
+            ORDER BY id
+            """,
+            params
+        )
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.rollback() # End the read-only transaction; don't hold a snapshot open
+
+
+def drop_expired_partitions(conn, keep_last, cutoff, lock_timeout):
+    """
+    Drops whole extracted_data partitions that ended before now (and before the
+    age cutoff, if any) and hold no rows of a retained analysis.
+    Returns (partitions_dropped, rows_reclaimed).
+    """
+    condition, params = _expired_condition(keep_last, cutoff)
+    horizon = min(cutoff, datetime.now()) if cutoff else datetime.now()
+    cur = conn.cursor()
+    dropped = rows = 0
+    try:
+        cur.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'extracted_data'::regclass AND c.relname LIKE %s
+            ORDER BY c.relname
+            """,
+            (PARTITION_PREFIX + '%',)
+        )
+        partitions = [row[0] for row in cur.fetchall()]
+        conn.rollback()
+
+        for name in partitions:
+            month = _partition_month(name)
+            if _add_months(month, 1) > horizon:
+                continue
+            table = sql.Identifier(name)
+            cur.execute(
+                sql.SQL("SELECT 1 FROM {} ed JOIN ({}) ranked ON ranked.id = ed.analysis_id WHERE NOT ({}) LIMIT 1")
+                   .format(table, sql.SQL(RANKED_ANALYSES_SQL), sql.SQL(condition)),
+                params
+            )
+            if cur.fetchone() is not None:
+                conn.rollback()
+                logger.debug("Partition %s still holds retained analyses; skipping", name)
+                continue
+
+            # DETACH ... CONCURRENTLY is not an option: it is refused while the
+            # table has a default partition. A lock timeout skips this partition only.
+            try:
+                cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+                cur.execute(sql.SQL("SELECT count(*) FROM {}").format(table))
+                partition_rows = cur.fetchone()[0]
+                cur.execute(sql.SQL("ALTER TABLE extracted_data DETACH PARTITION {}").format(table))
+                cur.execute(sql.SQL("DROP TABLE {}").format(table))
+                conn.commit()
+            except errors.LockNotAvailable:
+                conn.rollback()
+                logger.warning("Lock timeout detaching partition %s; leaving it for the next run", name)
+                continue
+            dropped += 1
+            rows += partition_rows
+            logger.info("Dropped partition %s (%s rows)", name, partition_rows)
+        return dropped, rows
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def delete_expired_analyses(conn, analysis_ids, batch_size, pause_seconds, lock_timeout):
+    """
+    Deletes expired analyses and their extracted_data rows, `batch_size` analyses
+    per transaction. Batches that hit the lock timeout are skipped and left for
+    the next run. Returns (analyses_deleted, data_rows_deleted).
+    """
+    analyses_deleted = rows_deleted = 0
+    cur = conn.cursor()
+    try:
+        for start in range(0, len(analysis_ids), batch_size):
+            chunk = analysis_ids[start:start + batch_size]
+            try:
+                cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+                cur.execute("DELETE FROM extracted_data WHERE analysis_id = ANY(%s)", (chunk,))
+                chunk_rows = cur.rowcount
+                cur.execute("DELETE FROM pdf_analyses WHERE id = ANY(%s)", (chunk,))
+                chunk_analyses = cur.rowcount
+                conn.commit()
+            except errors.LockNotAvailable:
+                conn.rollback()
+                logger.warning("Lock timeout deleting analyses %s..%s; leaving them for the next run", chunk[0], chunk[-1])
+                continue
+            analyses_deleted += chunk_analyses
+            rows_deleted += chunk_rows
+            logger.debug("Deleted %s analyses / %s data rows", chunk_analyses, chunk_rows)
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        return analyses_deleted, rows_deleted
+    finally:
+        cur.close()
+
+
+def run_compaction(keep_last, max_age_days, batch_size, pause_seconds=0, months_ahead=2, lock_timeout='2s',
+                   move_batch_size=10000):
+    """
+    Enforces the retention policy and maintains extracted_data partitions.
+    Returns a report dict with rows reclaimed and time taken.
+    """
+    started = time.monotonic()
+    cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days is not None else None
+    conn = get_db_connection()
+    try:
+        partitions_created = ensure_partitions(conn, months_ahead, move_batch_size, lock_timeout)
+        expired = find_expired_analyses(conn, keep_last, cutoff)
+        logger.info("%s analyses outside retention policy (keep_last=%s, max_age_days=%s)", len(expired), keep_last, max_age_days)
+        partitions_dropped, partition_rows = drop_expired_partitions(conn, keep_last, cutoff, lock_timeout)
+        analyses_deleted, data_rows = delete_expired_analyses(conn, expired, batch_size, pause_seconds, lock_timeout)
+    finally:
+        conn.close()
+
+    return {
+        'partitions_created': len(partitions_created),
+        'partitions_dropped': partitions_dropped,
+        'analyses_deleted': analyses_deleted,
+        'extracted_data_rows_reclaimed': partition_rows + data_rows,
+        'elapsed_seconds': round(time.monotonic() - started, 2),
+    }
+
+
+def run_partition_maintenance(months_ahead, move_batch_size=10000, lock_timeout='2s'):
+    """
+    Only creates upcoming partitions and splits rows out of the default
+    partition; deletes nothing. Returns a report dict like run_compaction().
+    """
+    started = time.monotonic()
+    conn = get_db_connection()
+    try:
+        partitions_created = ensure_partitions(conn, months_ahead, move_batch_size, lock_timeout)
+    finally:
+        conn.close()
+
+    return {
+        'partitions_created': len(partitions_created),
+        'elapsed_seconds': round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,101 @@
+import logging
+import psycopg2
+from app.services.db_service import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Maintenance for the analysis_summaries read model.
+# The API keeps summaries current inside the analyze_pdf transaction; these
+# helpers rebuild them from the normalized tables (backfill) and report where
+# the two disagree (check).
+
+# Latest analysis per (pdf_id, analysis_type) rebuilt from pdfs/pdf_analyses/extracted_data.
+# "Latest" is the highest analysis id, matching upsert_analysis_summary().
+EXPECTED_SUMMARIES_SQL = """
+    SELECT latest.pdf_id, latest.analysis_type, latest.id AS analysis_id,
+           p.filename AS pdf_filename, latest.analysis_date,
+           COALESCE((
+               SELECT jsonb_object_agg(grouped.data_key, grouped.data_values)
+               FROM (
+                   SELECT ed.data_key, jsonb_agg(ed.data_value ORDER BY ed.id) AS data_values
+                   FROM extracted_data ed
+                   WHERE ed.analysis_id = latest.id AND ed.data_key IS NOT NULL
+                   GROUP BY ed.data_key
+               ) grouped
+           ), '{{}}'::jsonb) AS result
+    FROM (
+        SELECT DISTINCT ON (pa.pdf_id, pa.analysis_type) pa.id, pa.pdf_id, pa.analysis_type, pa.analysis_date
+        FROM pdf_analyses pa
+        WHERE {pdf_filter}
+        ORDER BY pa.pdf_id, pa.analysis_type, pa.id DESC
+    ) latest
+    JOIN pdfs p ON p.id = latest.pdf_id
+"""
+
+
+def backfill_summaries(batch_size):
+    """
+    Rebuilds analysis_summaries from the normalized tables, `batch_size` PDF ids
+    per transaction. Returns the number of summaries written.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    written = 0
+    try:
+        cur.execute("SELECT min(pdf_id), max(pdf_id) FROM pdf_analyses")
+        low, high = cur.fetchone()
+        if low is None:
+            return 0
+        upsert_sql = f"""
+            INSERT INTO analysis_summaries (pdf_id, analysis_type, analysis_id, pdf_filename, analysis_date, result)
+            {EXPECTED_SUMMARIES_SQL.format(pdf_filter="pa.pdf_id >= %s AND pa.pdf_id < %s")}
+            ON CONFLICT (pdf_id, analysis_type) DO UPDATE
+            SET analysis_id = EXCLUDED.analysis_id, pdf_filename = EXCLUDED.pdf_filename,
+                analysis_date = EXCLUDED.analysis_date, result = EXCLUDED.result
+            WHERE analysis_summaries.analysis_id <= EXCLUDED.analysis_id
+        """
+        for start in range(low, high + 1, batch_size):
+            cur.execute(upsert_sql, (start, start + batch_size))
+            conn.commit()
+            written += cur.rowcount
+            logger.info("Backfilled summaries for PDF ids %s..%s (%s so far)", start, start + batch_size - 1, written)
+        return written
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def check_summaries(limit=100):
+    """
+    Compares analysis_summaries with the normalized tables.
+    Returns (mismatch_count, sample) where sample holds up to `limit`
+    (pdf_id, analysis_type, problem) tuples; problem is 'missing', 'orphaned' or 'stale'.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"""
+            WITH expected AS ({EXPECTED_SUMMARIES_SQL.format(pdf_filter="TRUE")})
+            SELECT COALESCE(e.pdf_id, s.pdf_id), COALESCE(e.analysis_type, s.analysis_type),
+                   CASE WHEN s.pdf_id IS NULL THEN 'missing'
+                        WHEN e.pdf_id IS NULL THEN 'orphaned'
+                        ELSE 'stale' END
+            FROM expected e
+            FULL JOIN analysis_summaries s
+              ON s.pdf_id = e.pdf_id AND s.analysis_type = e.analysis_type
+            WHERE s.pdf_id IS NULL OR e.pdf_id IS NULL
+               OR s.analysis_id <> e.analysis_id
+               OR s.result <> e.result
+               OR s.pdf_filename IS DISTINCT FROM e.pdf_filename
+            ORDER BY 1, 2
+            """
+        )
+        mismatches = cur.fetchall()
+        return len(mismatches), mismatches[:limit]
+    finally:
+        cur.close()
+        conn.close()
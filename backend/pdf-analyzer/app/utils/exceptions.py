@@ -4,4 +4,8 @@ class NotFoundError(Exception):
   
 class NotFoundError(Exception):
     """Custom exception for cases where PDF or analysis is not found."""
-    pass
\ No newline at end of file
+    pass
+
+class UnknownAnalysisTypeError(ValueError):
+    """Raised when a requested analysis_type has no registered analyzer."""
+    pass
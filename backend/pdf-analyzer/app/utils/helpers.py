@@ -1,6 +1,42 @@
+import json
+import base64
+from datetime import datetime
 from flask import current_app
 
 def allowed_file(filename):
     """Checks if the filename has an allowed extension."""
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
\ No newline at end of file
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def encode_cursor(sort_value, row_id):
+    """Encodes a keyset pagination position (timestamp, id) as an opaque URL-safe cursor."""
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decodes a cursor from encode_cursor(). Raises ValueError if it is malformed."""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def parse_bool_arg(value):
+    """Parses an optional boolean query parameter ('true'/'false', '1'/'0'). Returns None if absent."""
+    if value is None:
+        return None
+    lowered = value.lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+def parse_datetime_arg(value):
+    """Parses an optional ISO 8601 date/datetime query parameter. Returns None if absent."""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}. Use ISO 8601, e.g. 2024-01-31 or 2024-01-31T12:00:00") from None
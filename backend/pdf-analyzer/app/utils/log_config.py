@@ -0,0 +1,230 @@
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+# Non-blocking logging pipeline.
+# Request threads only run the level check, the rate-limit filter and a
+# put_nowait() onto an in-memory queue; message formatting (the %-args),
+# JSON encoding and the actual write happen on the QueueListener thread.
+# Logging calls should therefore pass arguments lazily:
+#   logger.info("Found %d components for PDF ID %s", len(components), pdf_id)
+# not pre-formatted f-strings.
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-logger token bucket for records below WARNING: each logger may emit
+    `rate` records per second with bursts up to `burst`. Warnings and errors
+    always pass. The number of dropped records is attached to the next record
+    that gets through (as `suppressed`) so gaps stay visible.
+    """
+    def __init__(self, rate, burst, overrides=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets = {} # logger name -> [tokens, last_refill, suppressed]
+        self._lock = threading.Lock()
+
+    def _limits(self, name):
+        rate = self.overrides.get(name, self.rate)
+        if rate is None:
+            return None, None
+        return rate, max(self.burst, rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate, burst = self._limits(record.name)
+        if rate is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [burst, now, 0]
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never formats on the calling thread and never blocks.
+    Oversized container arguments are capped before enqueueing; when the queue
+    is full the record is dropped and counted instead of stalling the request;
+    the count is attached to the next record that gets queued (as `dropped`).
+    Uses a SimpleQueue (no Condition bookkeeping per put) with a soft size bound.
+    """
+    def __init__(self, log_queue, max_arg_items, max_queued):
+        super().__init__(log_queue)
+        self.max_arg_items = max_arg_items
+        self.max_queued = max_queued
+        self.dropped = 0
+
+    def _cap(self, arg):
+        if isinstance(arg, (list, tuple, set, frozenset)) and len(arg) > self.max_arg_items:
+            items = list(arg)[:self.max_arg_items]
+            return f"{items!r}[...{len(arg) - self.max_arg_items} more]"
+        if isinstance(arg, dict) and len(arg) > self.max_arg_items:
+            return f"<dict with {len(arg)} keys>"
+        # Snapshot mutable containers: the listener formats them later, by which
+        # time the caller may have changed them. The copy is shallow, and other
+        # mutable objects are still passed by reference, so only log those if
+        # they aren't modified afterwards (or pass str(obj)).
+        if isinstance(arg, list):
+            return list(arg)
+        if isinstance(arg, dict):
+            return dict(arg)
+        if isinstance(arg, set):
+            return set(arg)
+        return arg
+
+    def prepare(self, record):
+        # Unlike the stdlib prepare(), keep msg/args unformatted: the listener
+        # thread calls getMessage(). Only tracebacks are rendered here, so the
+        # record doesn't keep frames alive while it waits in the queue.
+        # Work on a copy: other handlers on the logger chain still see the
+        # caller's record with its original args and exc_info.
+        record = copy.copy(record)
+        if record.args:
+            if isinstance(record.args, tuple):
+                record.args = tuple(self._cap(arg) for arg in record.args)
+            elif isinstance(record.args, dict):
+                record.args = {key: self._cap(value) for key, value in record.args.items()}
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.max_queued:
+            self.dropped += 1
+            return
+        # Called under the handler lock, so the counter needs no lock of its own
+        if self.dropped:
+            record.dropped = self.dropped
+            self.dropped = 0
+        self.queue.put_nowait(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; the message and traceback are truncated to `max_chars`."""
+    def __init__(self, max_chars):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def _truncate(self, text):
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}...[truncated {len(text) - self.max_chars} chars]"
+        return text
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': self._truncate(record.getMessage()),
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if getattr(record, 'dropped', 0):
+            entry['dropped'] = record.dropped
+        if record.exc_text:
+            entry['exc'] = self._truncate(record.exc_text)
+        return json.dumps(entry, default=str)
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Plain-text formatter (for local development) with the same message cap."""
+    def __init__(self, fmt, max_chars):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record):
+        if len(record.message) > self.max_chars:
+            record.message = f"{record.message[:self.max_chars]}...[truncated {len(record.message) - self.max_chars} chars]"
+        if getattr(record, 'suppressed', 0):
+            record.message += f" [{record.suppressed} earlier records suppressed]"
+        if getattr(record, 'dropped', 0):
+            record.message += f" [{record.dropped} records dropped, log queue full]"
+        return super().formatMessage(record)
+
+
+def _parse_level(name):
+    """Maps a level name in any case ('info', 'WARNING') to its number; raises ValueError otherwise."""
+    level = logging.getLevelName(str(name).strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Invalid LOG_LEVEL: {name!r}")
+    return level
+
+
+def configure_logging(config):
+    """
+    Routes all logging through a bounded queue drained by a background
+    QueueListener. `config` is the Flask app config (any mapping works).
+    Safe to call more than once; the previous pipeline is stopped and replaced.
+    """
+    global _listener
+    stop_logging()
+
+    # An explicit LOG_LEVEL wins; otherwise DEBUG builds log at DEBUG
+    if config.get('LOG_LEVEL'):
+        level = _parse_level(config['LOG_LEVEL'])
+    else:
+        level = logging.DEBUG if config.get('DEBUG') else logging.INFO
+    max_chars = config.get('LOG_MAX_MESSAGE_CHARS', 2000)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if config.get('LOG_JSON', True):
+        stream_handler.setFormatter(JsonFormatter(max_chars))
+    else:
+        stream_handler.setFormatter(TruncatingFormatter('%(levelname)s:%(name)s:%(message)s', max_chars))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue, config.get('LOG_MAX_ARG_ITEMS', 20),
+                                            config.get('LOG_QUEUE_SIZE', 10000))
+    queue_handler.addFilter(RateLimitFilter(
+        rate=config.get('LOG_RATE_LIMIT_PER_SEC', 50),
+        burst=config.get('LOG_RATE_LIMIT_BURST', 100),
+        overrides=config.get('LOG_RATE_LIMITS'),
+    ))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    # Third-party parsers are extremely chatty at DEBUG (pdfminer logs every token)
+    for name, logger_level in config.get('LOG_LEVEL_OVERRIDES', {}).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return queue_handler
+
+def stop_logging():
+    """Flushes queued records and stops the background listener, if running."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+from app.config import Config
+from app.utils.log_config import configure_logging, stop_logging
+
+# Measures the logging cost paid on the request thread for one simulated
+# analyze_pdf request, before (basicConfig + f-strings, written synchronously)
+# and after (queue-backed pipeline + lazy %-args) the logging changes.
+#   python bench_logging.py [--requests 2000] [--components 300]
+
+PDF_PATH = '/srv/uploads/maintenance_manual_rev7.pdf'
+
+
+def simulated_request_eager(log, pdf_id, components):
+    # Mirrors the original call sites, including the full component list at INFO
+    log.debug(f"Extracting text from: {PDF_PATH}")
+    log.info(f"Text extracted successfully from {PDF_PATH} (length: {len(components) * 40}).")
+    log.debug("Starting component extraction from text.")
+    log.info(f"Component extraction found {len(components)} unique components.")
+    log.debug(f"Extracted components: {components}")
+    log.info(f"Found {len(components)} components for PDF ID {pdf_id}: {components}")
+    log.info(f"Created analysis record ID {pdf_id * 3} for PDF ID {pdf_id}")
+    log.info(f"Inserted {len(components)} components into extracted_data for analysis ID {pdf_id * 3}")
+
+def simulated_request_lazy(log, pdf_id, components):
+    log.debug("Extracting text from: %s", PDF_PATH)
+    log.info("Text extracted successfully from %s (length: %s).", PDF_PATH, len(components) * 40)
+    log.debug("Starting component extraction from text.")
+    log.info("Component extraction found %s unique components.", len(components))
+    log.debug("Extracted components: %s", components)
+    log.info("Found %s components for PDF ID %s", len(components), pdf_id)
+    log.info("Created analysis record ID %s for PDF ID %s", pdf_id * 3, pdf_id)
+    log.info("Inserted %s rows into extracted_data for analysis ID %s", len(components), pdf_id * 3)
+
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+def _run(request_fn, requests, components):
+    log = logging.getLogger('bench')
+    started = time.perf_counter()
+    for pdf_id in range(requests):
+        request_fn(log, pdf_id, components)
+    return (time.perf_counter() - started) / requests
+
+def bench_before(requests, components, out):
+    _reset_root()
+    logging.basicConfig(level=logging.INFO, stream=out)
+    per_request = _run(simulated_request_eager, requests, components)
+    _reset_root()
+    return per_request, 0.0
+
+def bench_after(requests, components, out, rate_limit):
+    _reset_root()
+    config = {key: getattr(Config, key) for key in dir(Config) if key.startswith('LOG_')}
+    config.update(DEBUG=False, LOG_LEVEL='INFO', LOG_RATE_LIMIT_PER_SEC=rate_limit,
+                  LOG_QUEUE_SIZE=requests * 10) # Large enough that nothing is dropped for queue-full
+    stderr = sys.stderr
+    sys.stderr = out # configure_logging writes to sys.stderr
+    try:
+        configure_logging(config)
+    finally:
+        sys.stderr = stderr
+    per_request = _run(simulated_request_lazy, requests, components)
+    drain_started = time.perf_counter()
+    stop_logging() # Background thread finishes writing everything queued
+    drain = time.perf_counter() - drain_started
+    _reset_root()
+    return per_request, drain
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-request logging overhead.")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--components', type=int, default=300, help="Components found per simulated document")
+    args = parser.parse_args(argv)
+    components = [f"MTR-DRV-{i} drive unit" for i in range(args.components)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for label, fn in (
+            ('before: sync handler, f-strings', lambda out: bench_before(args.requests, components, out)),
+            ('after: queue + lazy, no rate limit', lambda out: bench_after(args.requests, components, out, None)),
+            ('after: queue + lazy, default rate limit', lambda out: bench_after(args.requests, components, out, Config.LOG_RATE_LIMIT_PER_SEC)),
+        ):
+            path = os.path.join(tmp, 'log.txt')
+            with open(path, 'w') as out:
+                per_request, drain = fn(out)
+            results.append((label, per_request, drain, os.path.getsize(path)))
+
+    print(f"{args.requests} requests, {args.components} components each")
+    for label, per_request, drain, size in results:
+        print(f"{label:42s} {per_request * 1e6:9.1f} us/request on caller thread"
+              f"   drain {drain * 1e3:7.1f} ms   log bytes {size / args.requests:9.0f}/request")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import logging
+import argparse
+
+from app import create_app
+from app.services.retention_service import run_compaction, run_partition_maintenance
+
+logger = logging.getLogger(__name__)
+
+# Compaction job for analysis history: enforces the retention policy from
+# config (RETENTION_KEEP_LAST / RETENTION_MAX_AGE_DAYS), drops expired
+# extracted_data partitions and creates upcoming ones.
+# Meant to be run periodically, e.g. nightly from cron:
+#   python compact.py [--keep-last 5] [--max-age-days 30]
+# --partitions-only just creates partitions and moves rows out of
+# extracted_data_default, deleting nothing (use it after the partition migration).
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete analysis history outside the retention policy.")
+    parser.add_argument('--keep-last', type=int, default=None,
+                        help="Keep the last N analyses per (pdf_id, analysis_type) (default: RETENTION_KEEP_LAST)")
+    parser.add_argument('--max-age-days', type=int, default=None,
+                        help="Keep analyses younger than this many days (default: RETENTION_MAX_AGE_DAYS)")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Analyses deleted per transaction (default: COMPACTION_BATCH_SIZE)")
+    parser.add_argument('--partitions-only', action='store_true',
+                        help="Only create partitions and move rows out of the default partition; delete nothing")
+    args = parser.parse_args(argv)
+
+    app = create_app(os.getenv('FLASK_CONFIG') or 'default')
+    with app.app_context():
+        cfg = app.config
+        if args.partitions_only:
+            report = run_partition_maintenance(
+                months_ahead=cfg['PARTITION_MONTHS_AHEAD'],
+                move_batch_size=cfg['PARTITION_MOVE_BATCH_SIZE'],
+                lock_timeout=cfg['COMPACTION_LOCK_TIMEOUT'],
+            )
+        else:
+            report = run_compaction(
+                keep_last=args.keep_last if args.keep_last is not None else cfg['RETENTION_KEEP_LAST'],
+                max_age_days=args.max_age_days if args.max_age_days is not None else cfg['RETENTION_MAX_AGE_DAYS'],
+                batch_size=args.batch_size or cfg['COMPACTION_BATCH_SIZE'],
+                pause_seconds=cfg['COMPACTION_PAUSE_SECONDS'],
+                months_ahead=cfg['PARTITION_MONTHS_AHEAD'],
+                lock_timeout=cfg['COMPACTION_LOCK_TIMEOUT'],
+                move_batch_size=cfg['PARTITION_MOVE_BATCH_SIZE'],
+            )
+    logger.info("Compaction finished: %s", report)
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import shutil
+import filecmp
+import hashlib
+import logging
+import argparse
+import multiprocessing
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app import create_app
+from app.utils.log_config import configure_logging
+from app.services.analysis_service import run_analyses, get_analyzer, DEFAULT_ANALYSIS_TYPE
+from app.services.pdf_service import PAGE_IMAGE_ONLY
+from app.services.db_service import get_db_connection, reserve_ids, copy_rows, rows_to_result
+
+logger = logging.getLogger(__name__)
+
+# Offline bulk loader for historical archives.
+# Walks a directory tree, runs the registered analyzers on every core with the
+# same analysis_service the API uses (one parse per document), and writes pdfs / pdf_analyses /
+# extracted_data with COPY in large batches instead of one HTTP round trip
+# (and one DB connection) per upload and per analysis. analysis_summaries rows
+# are written in the same transaction, so the read model stays consistent.
+#
+# Usage: python ingest.py /path/to/archive [--workers 8] [--batch-size 500]
+#                         [--analysis-type component_extraction ...]
+# Re-running with the same checkpoint file skips everything already loaded.
+
+def _init_worker(log_config):
+    # Forked workers don't inherit the parent's log listener thread
+    configure_logging(log_config)
+
+
+def _stored_name(rel_path):
+    """
+    Upload-folder name for an archive file. secure_filename() alone collides
+    (a/b.pdf vs a_b.pdf) and reduces non-ASCII names to bare 'pdf', so prefix
+    a hash of the relative path and always keep the .pdf extension.
+    """
+    digest = hashlib.sha1(rel_path.encode('utf-8')).hexdigest()[:16]
+    safe = secure_filename(rel_path)
+    if not safe.lower().endswith('.pdf'):
+        safe = f"{safe}.pdf" if safe else "document.pdf"
+    return f"ingest_{digest}_{safe}"
+
+
+def _copy_into_upload_folder(src_path, dst_path):
+    """Copies without ever overwriting; an identical file left by an interrupted run is reused."""
+    try:
+        dst = open(dst_path, 'xb')
+    except FileExistsError:
+        if not filecmp.cmp(src_path, dst_path, shallow=False):
+            raise FileExistsError(f"{dst_path} already exists with different content")
+        return
+    try:
+        with dst, open(src_path, 'rb') as src:
+            shutil.copyfileobj(src, dst)
+        shutil.copystat(src_path, dst_path)
+    except OSError:
+        # Don't leave a partial file behind; it would block the retry
+        os.remove(dst_path)
+        raise
+
+
+def _process_file(job):
+    """Worker: copies one PDF into the upload folder and runs the requested analyzers on it."""
+    src_path, rel_path, stored_name, upload_folder, analysis_types = job
+    if upload_folder:
+        try:
+            _copy_into_upload_folder(src_path, os.path.join(upload_folder, stored_name))
+        except OSError as e:
+            # Not checkpointed, so the file is retried on the next run
+            logger.error("Error copying %s into upload folder: %s", src_path, e)
+            return None
+    document, results = run_analyses(src_path, analysis_types)
+    return rel_path, stored_name, document.page_classes, results
+
+
+def _iter_pdf_files(root, allowed_extensions):
+    """Yields (absolute_path, path_relative_to_root) for every allowed file under root."""
+    # Consumed by the pool's task-feeder thread, so no current_app access in here.
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if '.' in name and name.rsplit('.', 1)[1].lower() in allowed_extensions:
+                abs_path = os.path.join(dirpath, name)
+                yield abs_path, os.path.relpath(abs_path, root)
+
+
+def _load_checkpoint(path):
+    """Returns the set of relative paths already committed by a previous run."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def _append_checkpoint(path, rel_paths):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(f"{p}\n" for p in rel_paths)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _flush_batch(conn, batch):
+    """
+    Writes one batch of worker results in a single transaction using COPY.
+    Documents whose stored name is already in pdfs (a batch that committed just
+    before a crash, before its checkpoint was written) are left out, so resuming
+    never loads a document twice. Returns (batch entries written, extracted rows).
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute('SELECT filename FROM pdfs WHERE filename = ANY(%s)',
+                    ([stored_name for _, stored_name, _, _ in batch],))
+        loaded = {row[0] for row in cur.fetchall()}
+        if loaded:
+            logger.warning("Skipping %s documents already loaded by an earlier run", len(loaded))
+            batch = [entry for entry in batch if entry[1] not in loaded]
+            if not batch:
+                conn.rollback()
+                return [], 0
+
+        pdf_ids = reserve_ids(cur, 'pdfs', len(batch))
+        # One analysis per (document, analysis_type), in batch order
+        analyses = [(pdf_id, analysis_type, rows, page_classes)
+                    for pdf_id, (_, _, page_classes, results) in zip(pdf_ids, batch)
+                    for analysis_type, rows in results.items()]
+        analysis_ids = reserve_ids(cur, 'pdf_analyses', len(analyses))
+
+        copy_rows(cur, 'pdfs', ('id', 'filename'),
+                  ((pdf_id, stored_name) for pdf_id, (_, stored_name, _, _) in zip(pdf_ids, batch)))
+        copy_rows(cur, 'pdf_analyses', ('id', 'pdf_id', 'analysis_type', 'page_classes'),
+                  ((analysis_id, pdf_id, analysis_type, json.dumps(page_classes))
+                   for analysis_id, (pdf_id, analysis_type, _, page_classes) in zip(analysis_ids, analyses)))
+        data_rows = copy_rows(cur, 'extracted_data', ('analysis_id', 'data_key', 'data_value'),
+                              ((analysis_id, data_key, data_value)
+                               for analysis_id, (_, _, rows, _) in zip(analysis_ids, analyses)
+                               for data_key, data_value in rows))
+        # Every document in the batch is new, so summaries can be copied rather than upserted
+        stored_names = dict(zip(pdf_ids, (stored_name for _, stored_name, _, _ in batch)))
+        copy_rows(cur, 'analysis_summaries', ('pdf_id', 'analysis_type', 'analysis_id', 'pdf_filename', 'result'),
+                  ((pdf_id, analysis_type, analysis_id, stored_names[pdf_id], json.dumps(rows_to_result(rows)))
+                   for analysis_id, (pdf_id, analysis_type, rows, _) in zip(analysis_ids, analyses)))
+        conn.commit()
+        return batch, data_rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def run_ingest(root, workers, batch_size, checkpoint_path, analysis_types, copy_files=True):
+    """Ingests every PDF under root. Returns (docs, pages) loaded by this run."""
+    upload_folder = current_app.config['UPLOAD_FOLDER'] if copy_files else None
+    allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
+    done = _load_checkpoint(checkpoint_path)
+    if done:
+        logger.info("Resuming: %s files already ingested according to %s", len(done), checkpoint_path)
+
+    jobs = (
+        (abs_path, rel_path, _stored_name(rel_path), upload_folder, analysis_types)
+        for abs_path, rel_path in _iter_pdf_files(root, allowed_extensions)
+        if rel_path not in done
+    )
+
+    total_docs = total_pages = 0
+    started = time.monotonic()
+    log_config = {key: value for key, value in current_app.config.items() if key.startswith('LOG_') or key == 'DEBUG'}
+    with multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(log_config,)) as pool:
+        # Connect only after the workers are forked so they don't inherit the libpq socket
+        conn = get_db_connection()
+        try:
+            batch = []
+            for result in pool.imap_unordered(_process_file, jobs, chunksize=4):
+                if result is None:
+                    continue
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    total_docs, total_pages = _commit_batch(conn, batch, checkpoint_path,
+                                                            total_docs, total_pages, started)
+                    batch = []
+            if batch:
+                total_docs, total_pages = _commit_batch(conn, batch, checkpoint_path,
+                                                        total_docs, total_pages, started)
+        finally:
+            conn.close()
+    return total_docs, total_pages
+
+
+def _commit_batch(conn, batch, checkpoint_path, total_docs, total_pages, started):
+    written, data_rows = _flush_batch(conn, batch)
+    # Checkpoint only after the COPY transaction committed; after a crash in
+    # between, the resumed run re-processes this batch and _flush_batch skips it.
+    _append_checkpoint(checkpoint_path, [rel_path for rel_path, _, _, _ in batch])
+
+    total_docs += len(written)
+    total_pages += sum(len(page_classes) for _, _, page_classes, _ in written)
+    image_only = sum(page_classes.count(PAGE_IMAGE_ONLY) for _, _, page_classes, _ in written)
+    elapsed = max(time.monotonic() - started, 1e-9)
+    logger.info(
+        "Committed batch of %s docs (%s extracted rows, %s image-only pages). "
+        "Total: %s docs, %s pages in %.1fs (%.1f docs/sec, %.1f pages/sec)",
+        len(written), data_rows, image_only, total_docs, total_pages, elapsed,
+        total_docs / elapsed, total_pages / elapsed
+    )
+    return total_docs, total_pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory tree of PDFs without going through the HTTP API.")
+    parser.add_argument('root', help="Directory to walk for PDF files")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Extraction processes (default: number of CPUs)")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Documents per COPY transaction (default: INGEST_BATCH_SIZE from config)")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Progress file used to resume interrupted runs (default: <root>/.ingest_checkpoint)")
+    parser.add_argument('--analysis-type', action='append', dest='analysis_types', default=None,
+                        help=f"Analyzer to run; repeat for several (default: {DEFAULT_ANALYSIS_TYPE})")
+    parser.add_argument('--no-copy', action='store_true',
+                        help="Do not copy files into UPLOAD_FOLDER (records will not be re-analyzable via the API)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"Not a directory: {args.root}")
+    analysis_types = args.analysis_types or [DEFAULT_ANALYSIS_TYPE]
+    for analysis_type in analysis_types:
+        try:
+            get_analyzer(analysis_type)
+        except ValueError as e:
+            parser.error(str(e))
+
+    app = create_app(os.getenv('FLASK_CONFIG') or 'default')
+    with app.app_context():
+        batch_size = args.batch_size or app.config['INGEST_BATCH_SIZE']
+        checkpoint = args.checkpoint or os.path.join(args.root, '.ingest_checkpoint')
+        started = time.monotonic()
+        docs, pages = run_ingest(args.root, args.workers, batch_size, checkpoint,
+                                 analysis_types, copy_files=not args.no_copy)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logger.info(
+            "Ingest finished: %s docs, %s pages in %.1fs (%.1f docs/sec, %.1f pages/sec)",
+            docs, pages, elapsed, docs / elapsed, pages / elapsed
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
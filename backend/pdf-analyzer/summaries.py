@@ -0,0 +1,41 @@
+import os
+import sys
+import logging
+import argparse
+
+from app import create_app
+from app.services.summary_service import backfill_summaries, check_summaries
+
+logger = logging.getLogger(__name__)
+
+# Maintenance for the analysis_summaries read model.
+#   python summaries.py backfill   # rebuild from pdfs / pdf_analyses / extracted_data
+#   python summaries.py check      # report summaries that disagree (exit code 1 if any)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill or verify the analysis_summaries read model.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subparsers.add_parser('backfill', help="Rebuild summaries from the normalized tables")
+    backfill_parser.add_argument('--batch-size', type=int, default=None,
+                                 help="PDF ids per transaction (default: SUMMARY_BACKFILL_BATCH_SIZE)")
+    check_parser = subparsers.add_parser('check', help="Compare summaries with the normalized tables")
+    check_parser.add_argument('--limit', type=int, default=20, help="Mismatches to print")
+    args = parser.parse_args(argv)
+
+    app = create_app(os.getenv('FLASK_CONFIG') or 'default')
+    with app.app_context():
+        if args.command == 'backfill':
+            written = backfill_summaries(args.batch_size or app.config['SUMMARY_BACKFILL_BATCH_SIZE'])
+            logger.info("Backfill finished: %s summaries written", written)
+            return 0
+
+        count, sample = check_summaries(limit=args.limit)
+        for pdf_id, analysis_type, problem in sample:
+            print(f"{problem}\tpdf_id={pdf_id}\tanalysis_type={analysis_type}")
+        print(f"{count} mismatched summaries")
+        return 1 if count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
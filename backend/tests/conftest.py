@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The Flask app lives in backend/pdf-analyzer, which isn't an importable package
+# name. Import its `app` package here, before pytest puts backend/ (and the old
+# backend/app.py module) at the front of sys.path for the test modules.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pdf-analyzer'))
+
+import app # noqa: E402,F401
@@ -0,0 +1,44 @@
+import io
+
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+
+# Minimal hand-written PDFs for the parser tests
+
+FONT = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+IMAGE = b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream"
+
+
+def build_pdf(content, resources=b"", extra_objects=()):
+    """
+    Builds a one-page PDF. Objects 1-4 are the catalog, page tree, page and its
+    content stream; `extra_objects` are numbered from 5 and can be referenced
+    from `resources`.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Resources << " + resources + b" >> /Contents 4 0 R >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        *extra_objects,
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def first_page(data):
+    document = PDFDocument(PDFParser(io.BytesIO(data)))
+    return next(PDFPage.create_pages(document))
+
+def form_xobject(content, resources=b""):
+    return (b"<< /Type /XObject /Subtype /Form /BBox [0 0 200 200] /Resources << " + resources
+            + b" >> /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
@@ -0,0 +1,102 @@
+import pytest
+from pdfminer.high_level import extract_text
+
+from app.services import analysis_service
+from app.services.analysis_service import (
+    CONSUMES_LAYOUT, CONSUMES_PAGES, CONSUMES_TEXT, get_analyzer, register_analyzer, run_analyses,
+)
+from app.services.pdf_service import ParsedDocument, parse_pdf, PAGE_TEXT
+from app.utils.exceptions import UnknownAnalysisTypeError
+
+from .pdf_builder import FONT, build_pdf, form_xobject
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Isolated copy of the analyzer registry, so test analyzers don't leak."""
+    monkeypatch.setattr(analysis_service, 'ANALYZERS', dict(analysis_service.ANALYZERS))
+    return analysis_service.ANALYZERS
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Replaces parse_pdf with a stub and records (path, keep_layout) for every call."""
+    calls = []
+    def fake_parse_pdf(pdf_path, keep_layout=False):
+        calls.append((pdf_path, keep_layout))
+        return ParsedDocument(pdf_path, ["spindle SP-1.", "motor M-2."], page_classes=[PAGE_TEXT, PAGE_TEXT])
+    monkeypatch.setattr(analysis_service, 'parse_pdf', fake_parse_pdf)
+    return calls
+
+
+def test_register_analyzer_rejects_duplicates(registry):
+    @register_analyzer('test_words', consumes={CONSUMES_TEXT}, emits={'word'})
+    def words(document):
+        return [('word', w) for w in document.text.split()]
+
+    assert get_analyzer('test_words').func is words
+    with pytest.raises(ValueError):
+        register_analyzer('test_words', consumes={CONSUMES_TEXT}, emits={'word'})(words)
+    with pytest.raises(ValueError):
+        register_analyzer('component_extraction', consumes={CONSUMES_TEXT}, emits=set())(words)
+
+def test_get_analyzer_unknown_type():
+    with pytest.raises(UnknownAnalysisTypeError, match='component_extraction'):
+        get_analyzer('no_such_analysis')
+
+def test_run_analyses_parses_once_for_all_analyzers(registry, parses):
+    document, results = run_analyses('/tmp/doc.pdf', ['component_extraction', 'page_statistics', 'component_extraction'])
+    assert parses == [('/tmp/doc.pdf', False)]
+    assert list(results) == ['component_extraction', 'page_statistics']
+    assert sorted(results['component_extraction']) == [('component_name', 'M-2'), ('component_name', 'SP-1')]
+    assert results['page_statistics'] == [('page_count', '2'), ('page_chars', '13'), ('page_chars', '10')]
+    assert document.page_count == 2
+
+def test_run_analyses_keeps_layout_only_when_consumed(registry, parses):
+    register_analyzer('test_pages', consumes={CONSUMES_PAGES}, emits={'n'})(lambda document: [])
+    register_analyzer('test_layout', consumes={CONSUMES_LAYOUT}, emits={'n'})(lambda document: [])
+    run_analyses('/tmp/a.pdf', ['test_pages'])
+    run_analyses('/tmp/b.pdf', ['test_pages', 'test_layout'])
+    assert parses == [('/tmp/a.pdf', False), ('/tmp/b.pdf', True)]
+
+def test_run_analyses_rejects_unknown_type_before_parsing(parses):
+    with pytest.raises(UnknownAnalysisTypeError):
+        run_analyses('/tmp/doc.pdf', ['component_extraction', 'no_such_analysis'])
+    assert parses == []
+
+
+def test_parse_pdf_text_matches_extract_text(tmp_path):
+    # Text inside a form XObject ends up in an LTFigure and must not be lost
+    form = form_xobject(b"BT /F1 12 Tf 20 100 Td (tool changer TC-24) Tj ET", b"/Font << /F1 6 0 R >>")
+    pdf = build_pdf(b"BT /F1 12 Tf 20 180 Td (spindle SP-200) Tj ET q /Fm1 Do Q",
+                    b"/XObject << /Fm1 5 0 R >> /Font << /F1 6 0 R >>", [form, FONT])
+    path = tmp_path / 'form.pdf'
+    path.write_bytes(pdf)
+    document = parse_pdf(str(path))
+    assert document.page_classes == [PAGE_TEXT]
+    assert 'tool changer TC-24' in document.text
+    assert document.text == extract_text(str(path))
+
+def test_parse_pdf_text_in_deeply_nested_forms(tmp_path):
+    # The pre-scan must follow forms as deep as pdfminer's interpreter does
+    forms = [form_xobject(b"q /Fm%d Do Q" % (level + 1), b"/XObject << /Fm%d %d 0 R >>" % (level + 1, 5 + level))
+             for level in range(1, 4)]
+    forms.append(form_xobject(b"BT /F1 12 Tf 20 100 Td (spindle SP-9) Tj ET", b"/Font << /F1 9 0 R >>"))
+    path = tmp_path / 'nested.pdf'
+    path.write_bytes(build_pdf(b"q /Fm1 Do Q", b"/XObject << /Fm1 5 0 R >>", [*forms, FONT]))
+    document = parse_pdf(str(path))
+    assert document.page_classes == [PAGE_TEXT]
+    assert 'spindle SP-9' in document.text
+    assert document.text == extract_text(str(path))
+
+def test_parse_pdf_keeps_layouts_on_request(tmp_path):
+    path = tmp_path / 'text.pdf'
+    path.write_bytes(build_pdf(b"BT /F1 12 Tf 20 100 Td (axis X-3) Tj ET", b"/Font << /F1 5 0 R >>", [FONT]))
+    assert parse_pdf(str(path)).layouts is None
+    layouts = parse_pdf(str(path), keep_layout=True).layouts
+    assert len(layouts) == 1 and layouts[0] is not None
+
+def test_parse_pdf_unreadable_file_gives_empty_document(tmp_path):
+    path = tmp_path / 'broken.pdf'
+    path.write_bytes(b'not a pdf')
+    document = parse_pdf(str(path))
+    assert document.page_count == 0 and document.text == ""
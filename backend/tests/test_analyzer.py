@@ -0,0 +1,80 @@
+import pytest
+
+from app.services import pdf_service
+from app.services.pdf_service import (
+    classify_page, parse_pdf, PAGE_TEXT, PAGE_IMAGE_ONLY, PAGE_MIXED, PAGE_EMPTY,
+)
+
+from .pdf_builder import FONT, IMAGE, build_pdf, first_page, form_xobject
+
+# --- Page pre-scan ---
+
+def test_classify_text_page():
+    pdf = build_pdf(b"BT /F1 12 Tf 20 100 Td (spindle SP-200) Tj ET", b"/Font << /F1 5 0 R >>", [FONT])
+    assert classify_page(first_page(pdf)) == PAGE_TEXT
+
+@pytest.mark.parametrize('content', [
+    b"BT 14 TL (motor M-1) ' ET",
+    b"BT 14 TL 0 0 (motor M-1)' ET",
+    b'BT 14 TL 1 0 (motor M-1) " ET',
+    b"BT 14 TL <6d6f746f72> ' ET",
+])
+def test_classify_quote_operators(content):
+    # No Tf and no Tj/TJ: only the ' or " operator shows the text
+    assert classify_page(first_page(build_pdf(content))) == PAGE_TEXT
+
+def test_classify_font_selection_counts_as_text():
+    pdf = build_pdf(b"BT /F1 12 Tf ET", b"/Font << /F1 5 0 R >>", [FONT])
+    assert classify_page(first_page(pdf)) == PAGE_TEXT
+
+def test_classify_form_xobject_text():
+    form = form_xobject(b"BT /F1 12 Tf 20 100 Td (axis X-3) Tj ET", b"/Font << /F1 6 0 R >>")
+    pdf = build_pdf(b"q /Fm1 Do Q", b"/XObject << /Fm1 5 0 R >>", [form, FONT])
+    assert classify_page(first_page(pdf)) == PAGE_TEXT
+
+def _nested_forms(depth, text):
+    """Page -> Fm1 -> ... -> Fm<depth>, which shows `text`; objects 5.. are the forms, then the font."""
+    font = b"%d 0 R" % (5 + depth)
+    forms = [form_xobject(b"q /Fm%d Do Q" % (level + 1), b"/XObject << /Fm%d %d 0 R >>" % (level + 1, 5 + level))
+             for level in range(1, depth)]
+    forms.append(form_xobject(b"BT /F1 12 Tf 20 100 Td (" + text + b") Tj ET", b"/Font << /F1 " + font + b" >>"))
+    return build_pdf(b"q /Fm1 Do Q", b"/XObject << /Fm1 5 0 R >>", [*forms, FONT])
+
+@pytest.mark.parametrize('depth', [1, 4, 8])
+def test_classify_deeply_nested_form_text(depth):
+    assert classify_page(first_page(_nested_forms(depth, b"spindle SP-9"))) == PAGE_TEXT
+
+def test_classify_form_cycle_terminates():
+    # Fm1 draws itself: scanned once, no unbounded recursion
+    loop = form_xobject(b"q /Fm1 Do Q", b"/XObject << /Fm1 5 0 R >>")
+    pdf = build_pdf(b"q /Fm1 Do Q", b"/XObject << /Fm1 5 0 R >>", [loop])
+    assert classify_page(first_page(pdf)) == PAGE_EMPTY
+
+    loop_with_image = form_xobject(b"q /Fm1 Do /Im1 Do Q", b"/XObject << /Fm1 5 0 R /Im1 6 0 R >>")
+    pdf = build_pdf(b"q /Fm1 Do Q", b"/XObject << /Fm1 5 0 R >>", [loop_with_image, IMAGE])
+    assert classify_page(first_page(pdf)) == PAGE_IMAGE_ONLY
+
+def test_classify_image_xobject():
+    pdf = build_pdf(b"q 200 0 0 200 0 0 cm /Im1 Do Q", b"/XObject << /Im1 5 0 R >>", [IMAGE])
+    assert classify_page(first_page(pdf)) == PAGE_IMAGE_ONLY
+
+def test_classify_inline_image():
+    pdf = build_pdf(b"q 200 0 0 200 0 0 cm BI /W 1 /H 1 /CS /G /BPC 8 ID \x80 EI Q")
+    assert classify_page(first_page(pdf)) == PAGE_IMAGE_ONLY
+
+def test_classify_mixed_page():
+    pdf = build_pdf(b"q 200 0 0 200 0 0 cm /Im1 Do Q BT /F1 12 Tf (controller C-9) Tj ET",
+                    b"/XObject << /Im1 5 0 R >> /Font << /F1 6 0 R >>", [IMAGE, FONT])
+    assert classify_page(first_page(pdf)) == PAGE_MIXED
+
+def test_classify_empty_page():
+    assert classify_page(first_page(build_pdf(b"0 0 m 200 200 l S"))) == PAGE_EMPTY
+
+def test_parse_pdf_skips_image_only_pages(tmp_path, monkeypatch):
+    path = tmp_path / 'scan.pdf'
+    path.write_bytes(build_pdf(b"q 200 0 0 200 0 0 cm /Im1 Do Q", b"/XObject << /Im1 5 0 R >>", [IMAGE]))
+    monkeypatch.setattr(pdf_service.PDFPageInterpreter, 'process_page',
+                        lambda self, page: pytest.fail("layout analysis ran on an image-only page"))
+    document = parse_pdf(str(path))
+    assert document.page_texts == [""]
+    assert document.needs_ocr and not document.has_text_layer
@@ -0,0 +1,138 @@
+import itertools
+
+import pytest
+
+import ingest
+from app.services.db_service import _copy_csv_field, copy_rows
+
+
+class FakeCursor:
+    """Records statements; answers the resume lookup and id reservations like PostgreSQL would."""
+    def __init__(self, loaded=()):
+        self.loaded = set(loaded)
+        self.statements = []
+        self.copies = {}
+        self._ids = itertools.count(1)
+        self._result = []
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+        if 'FROM pdfs WHERE filename' in query:
+            self._result = [(name,) for name in params[0] if name in self.loaded]
+        elif 'nextval' in query:
+            self._result = [(next(self._ids),) for _ in range(params[1])]
+
+    def fetchall(self):
+        return self._result
+
+    def copy_expert(self, sql, stream):
+        self.copies[sql.split()[1]] = stream.read()
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = self.rollbacks = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+# --- COPY encoding ---
+
+@pytest.mark.parametrize('value, expected', [
+    (None, '\\N'),
+    ('', '""'),
+    ('\\N', '"\\N"'),
+    ('say "hi", then go', '"say ""hi"", then go"'),
+    (42, '42'),
+    (1.5, '1.5'),
+    (True, '"True"'),
+])
+def test_copy_csv_field(value, expected):
+    assert _copy_csv_field(value) == expected
+
+def test_copy_rows_declares_null_marker():
+    cur = FakeCursor()
+    assert copy_rows(cur, 'extracted_data', ('analysis_id', 'data_value'), [(1, None), (2, ''), (3, '\\N')]) == 3
+    assert cur.copies['extracted_data'] == '1,\\N\n2,""\n3,"\\N"\n'
+
+def test_copy_rows_skips_empty_input():
+    cur = FakeCursor()
+    assert copy_rows(cur, 'pdfs', ('id', 'filename'), iter(())) == 0
+    assert cur.copies == {}
+
+
+# --- Stored names ---
+
+def test_stored_name_is_unique_per_relative_path():
+    assert ingest._stored_name('a/b.pdf') != ingest._stored_name('a_b.pdf')
+    assert ingest._stored_name('a/b.pdf') == ingest._stored_name('a/b.pdf')
+
+@pytest.mark.parametrize('rel_path, suffix', [
+    ('manuals/Spindle Rev7.pdf', '_manuals_Spindle_Rev7.pdf'),
+    ('日本語.pdf', '_pdf.pdf'),
+    ('日本語', '_document.pdf'),
+    ('scan.PDF', '_scan.PDF'),
+])
+def test_stored_name_is_safe(rel_path, suffix):
+    name = ingest._stored_name(rel_path)
+    assert name.startswith('ingest_') and name.endswith(suffix)
+    assert '/' not in name
+
+def test_copy_never_overwrites(tmp_path):
+    src, dst = tmp_path / 'src.pdf', tmp_path / 'dst.pdf'
+    src.write_bytes(b'%PDF-1 first')
+    ingest._copy_into_upload_folder(str(src), str(dst))
+    assert dst.read_bytes() == b'%PDF-1 first'
+
+    ingest._copy_into_upload_folder(str(src), str(dst)) # Identical leftover: reused
+
+    src.write_bytes(b'%PDF-1 second')
+    with pytest.raises(FileExistsError):
+        ingest._copy_into_upload_folder(str(src), str(dst))
+    assert dst.read_bytes() == b'%PDF-1 first'
+
+def test_failed_copy_leaves_no_partial_file(tmp_path):
+    dst = tmp_path / 'dst.pdf'
+    with pytest.raises(OSError):
+        ingest._copy_into_upload_folder(str(tmp_path / 'missing.pdf'), str(dst))
+    assert not dst.exists()
+
+
+# --- Batches ---
+
+def _entry(rel_path):
+    return rel_path, ingest._stored_name(rel_path), ['text'], {'component_extraction': [('component_name', rel_path)]}
+
+def test_flush_batch_writes_all_tables():
+    cur = FakeCursor()
+    conn = FakeConnection(cur)
+    written, data_rows = ingest._flush_batch(conn, [_entry('a.pdf'), _entry('b.pdf')])
+    assert [rel_path for rel_path, _, _, _ in written] == ['a.pdf', 'b.pdf']
+    assert data_rows == 2
+    assert set(cur.copies) == {'pdfs', 'pdf_analyses', 'extracted_data', 'analysis_summaries'}
+    assert conn.commits == 1
+
+def test_flush_batch_skips_documents_already_loaded():
+    # The previous run committed a.pdf but crashed before checkpointing it
+    cur = FakeCursor(loaded={ingest._stored_name('a.pdf')})
+    conn = FakeConnection(cur)
+    written, data_rows = ingest._flush_batch(conn, [_entry('a.pdf'), _entry('b.pdf')])
+    assert [rel_path for rel_path, _, _, _ in written] == ['b.pdf']
+    assert data_rows == 1
+    assert 'a.pdf' not in cur.copies['extracted_data']
+
+def test_flush_batch_with_everything_loaded_writes_nothing():
+    cur = FakeCursor(loaded={ingest._stored_name('a.pdf')})
+    conn = FakeConnection(cur)
+    assert ingest._flush_batch(conn, [_entry('a.pdf')]) == ([], 0)
+    assert cur.copies == {} and conn.commits == 0
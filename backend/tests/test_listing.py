@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.helpers import decode_cursor, encode_cursor, parse_bool_arg, parse_datetime_arg
+
+
+# --- Listing cursors ---
+
+def test_cursor_round_trip():
+    position = (datetime(2024, 3, 1, 12, 30, 5, 123456), 42)
+    cursor = encode_cursor(*position)
+    assert decode_cursor(cursor) == position
+    assert cursor.replace('-', '').replace('_', '').replace('=', '').isalnum()
+
+@pytest.mark.parametrize('cursor', ['', 'not a cursor', encode_cursor(datetime(2024, 1, 1), 1)[:-4], 'WzEsMiwzXQ=='])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+# --- Query parameters ---
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('true', True), ('TRUE', True), ('1', True), ('yes', True),
+    ('false', False), ('False', False), ('0', False), ('no', False),
+])
+def test_parse_bool_arg(value, expected):
+    assert parse_bool_arg(value) is expected
+
+@pytest.mark.parametrize('value', ['', 'maybe', '2'])
+def test_parse_bool_arg_rejects_other_values(value):
+    with pytest.raises(ValueError, match='Invalid boolean'):
+        parse_bool_arg(value)
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('2024-01-31', datetime(2024, 1, 31)),
+    ('2024-01-31T12:00:00', datetime(2024, 1, 31, 12)),
+    ('2024-01-31 12:30', datetime(2024, 1, 31, 12, 30)),
+])
+def test_parse_datetime_arg(value, expected):
+    assert parse_datetime_arg(value) == expected
+
+@pytest.mark.parametrize('value', ['', 'yesterday', '31/01/2024', '2024-13-01'])
+def test_parse_datetime_arg_rejects_other_values(value):
+    with pytest.raises(ValueError, match='ISO 8601'):
+        parse_datetime_arg(value)
@@ -0,0 +1,141 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from app.utils import log_config
+from app.utils.log_config import (
+    JsonFormatter, NonBlockingQueueHandler, RateLimitFilter, TruncatingFormatter, _parse_level, configure_logging,
+)
+
+
+# --- Log rate limiting ---
+
+def _record(name='app.test', level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, "message %s", (1,), None)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(log_config.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_rate_limit_burst_then_refill(clock):
+    rate_limit = RateLimitFilter(rate=2, burst=3)
+    assert [rate_limit.filter(_record()) for _ in range(5)] == [True, True, True, False, False]
+    clock[0] += 0.5 # One token back at 2 records/sec
+    record = _record()
+    assert rate_limit.filter(record)
+    assert record.suppressed == 2
+    assert not rate_limit.filter(_record())
+
+def test_rate_limit_is_per_logger_and_spares_warnings(clock):
+    rate_limit = RateLimitFilter(rate=1, burst=1)
+    assert rate_limit.filter(_record('a'))
+    assert not rate_limit.filter(_record('a'))
+    assert rate_limit.filter(_record('b'))
+    assert rate_limit.filter(_record('a', logging.WARNING))
+    assert rate_limit.filter(_record('a', logging.ERROR))
+
+def test_rate_limit_overrides(clock):
+    rate_limit = RateLimitFilter(rate=1, burst=1, overrides={'unlimited': None, 'busy': 5})
+    assert all(rate_limit.filter(_record('unlimited')) for _ in range(100))
+    # An override rate above the burst raises the burst to match
+    assert sum(rate_limit.filter(_record('busy')) for _ in range(10)) == 5
+
+
+# --- Queue handler ---
+
+@pytest.fixture
+def handler():
+    return NonBlockingQueueHandler(queue.SimpleQueue(), max_arg_items=3, max_queued=2)
+
+def test_cap_large_containers(handler):
+    assert handler._cap([1, 2, 3, 4, 5]) == "[1, 2, 3][...2 more]"
+    assert handler._cap((1, 2, 3, 4)) == "[1, 2, 3][...1 more]"
+    assert handler._cap({'a': 1, 'b': 2, 'c': 3, 'd': 4}) == "<dict with 4 keys>"
+
+def test_cap_snapshots_small_mutable_containers(handler):
+    items, mapping = [1, 2], {'a': 1}
+    capped_items, capped_mapping = handler._cap(items), handler._cap(mapping)
+    items.append(3)
+    mapping['b'] = 2
+    assert capped_items == [1, 2] and capped_mapping == {'a': 1}
+    assert handler._cap((1, 2)) == (1, 2)
+    assert handler._cap('text') == 'text'
+
+def test_prepare_leaves_callers_record_alone(handler):
+    components = ['SP-1', 'M-2', 'TC-24', 'X-3']
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord('app.test', logging.ERROR, __file__, 1, "found %s", (components,), sys.exc_info())
+    prepared = handler.prepare(record)
+    assert prepared is not record
+    assert prepared.args == ("['SP-1', 'M-2', 'TC-24'][...1 more]",)
+    assert prepared.exc_info is None and 'RuntimeError: boom' in prepared.exc_text
+    # Other handlers still get the original arguments and traceback
+    assert record.args == (components,) and record.args[0] is components
+    assert record.exc_info is not None and record.exc_text is None
+
+def test_prepare_dict_args(handler):
+    record = logging.LogRecord('app.test', logging.INFO, __file__, 1, "%(ids)s", ({'ids': [1, 2, 3, 4]},), None)
+    assert handler.prepare(record).args == {'ids': "[1, 2, 3][...1 more]"}
+    assert record.args == {'ids': [1, 2, 3, 4]}
+
+def test_full_queue_drops_and_reports_count(handler):
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.dropped == 3
+    first, second = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert not hasattr(first, 'dropped') and not hasattr(second, 'dropped')
+
+    handler.handle(_record())
+    reported = handler.queue.get_nowait()
+    assert reported.dropped == 3
+    assert handler.dropped == 0
+    handler.handle(_record())
+    assert not hasattr(handler.queue.get_nowait(), 'dropped')
+
+def test_formatters_show_dropped_count():
+    record = _record()
+    record.dropped = 3
+    assert json.loads(JsonFormatter(100).format(record))['dropped'] == 3
+    assert TruncatingFormatter('%(message)s', 100).format(record) == "message 1 [3 records dropped, log queue full]"
+
+
+# --- Levels ---
+
+@pytest.mark.parametrize('name, level', [('info', logging.INFO), (' WARNING ', logging.WARNING), ('Debug', logging.DEBUG)])
+def test_parse_level(name, level):
+    assert _parse_level(name) == level
+
+def test_parse_level_rejects_unknown_names():
+    with pytest.raises(ValueError, match='LOG_LEVEL'):
+        _parse_level('verbose')
+
+@pytest.fixture
+def root_logger():
+    """Puts the root logger back the way pytest set it up after configure_logging() replaced it."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    log_config.stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+@pytest.mark.parametrize('config, level', [
+    ({}, logging.INFO),
+    ({'DEBUG': True}, logging.DEBUG),
+    ({'DEBUG': True, 'LOG_LEVEL': None}, logging.DEBUG),
+    ({'DEBUG': True, 'LOG_LEVEL': 'WARNING'}, logging.WARNING),
+    ({'DEBUG': False, 'LOG_LEVEL': 'debug'}, logging.DEBUG),
+])
+def test_configure_logging_level(root_logger, config, level):
+    configure_logging(config)
+    assert root_logger.level == level
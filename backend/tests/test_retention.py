@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import pytest
+
+from app.services import retention_service
+from app.services.retention_service import (
+    _add_months, _expired_condition, _is_live_month, _months_to_partition, _partition_month, _partition_name,
+)
+
+
+@pytest.mark.parametrize('dt, months, expected', [
+    (datetime(2024, 1, 31, 15, 0), 1, datetime(2024, 2, 1)),
+    (datetime(2024, 11, 5), 2, datetime(2025, 1, 1)),
+    (datetime(2024, 12, 1), 1, datetime(2025, 1, 1)),
+    (datetime(2024, 1, 15), -1, datetime(2023, 12, 1)),
+    (datetime(2024, 3, 1), -15, datetime(2022, 12, 1)),
+    (datetime(2024, 6, 20), 0, datetime(2024, 6, 1)),
+])
+def test_add_months(dt, months, expected):
+    assert _add_months(dt, months) == expected
+
+def test_partition_name_round_trip():
+    assert _partition_name(datetime(2024, 3, 1)) == 'extracted_data_p202403'
+    assert _partition_month('extracted_data_p202403') == datetime(2024, 3, 1)
+
+
+# --- Retention policy ---
+
+def test_expired_condition_keep_last_only():
+    assert _expired_condition(5, None) == ("rn > %(keep_last)s", {'keep_last': 5})
+
+def test_expired_condition_cutoff_only():
+    cutoff = datetime(2024, 1, 1)
+    assert _expired_condition(None, cutoff) == ("analysis_date < %(cutoff)s", {'cutoff': cutoff})
+
+def test_expired_condition_requires_both_to_expire():
+    cutoff = datetime(2024, 1, 1)
+    condition, params = _expired_condition(0, cutoff)
+    # Kept if among the last N OR younger than the cutoff, so expired needs both
+    assert condition == "rn > %(keep_last)s AND analysis_date < %(cutoff)s"
+    assert params == {'keep_last': 0, 'cutoff': cutoff}
+
+def test_expired_condition_needs_a_policy():
+    with pytest.raises(ValueError):
+        _expired_condition(None, None)
+
+
+class FakeCursor:
+    def __init__(self, pending):
+        self.pending = pending
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchall(self):
+        query, _ = self.executed[-1]
+        if 'pg_class' in query:
+            return [(name,) for name in self.pending]
+        return [(7,), (9,)]
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def rollback(self):
+        pass
+
+def test_find_expired_analyses_skips_pending_months():
+    # Rows of a partition whose attach timed out are outside extracted_data, so
+    # deleting their analyses would orphan them
+    cur = FakeCursor(['extracted_data_p202403'])
+    assert retention_service.find_expired_analyses(FakeConnection(cur), 3, None) == [7, 9]
+    query, params = cur.executed[-1]
+    assert "date_trunc('month', analysis_date) <> ALL(%(pending_months)s::timestamp[])" in query
+    assert params == {'keep_last': 3, 'pending_months': [datetime(2024, 3, 1)]}
+
+def test_find_expired_analyses_without_pending_partitions():
+    cur = FakeCursor([])
+    retention_service.find_expired_analyses(FakeConnection(cur), 3, None)
+    assert cur.executed[-1][1]['pending_months'] == []
+
+
+# --- Partition maintenance ---
+
+def test_months_to_partition_puts_live_months_first():
+    months = _months_to_partition(datetime(2024, 1, 1), datetime(2024, 5, 1), datetime(2024, 3, 17))
+    assert months == [datetime(2024, 3, 1), datetime(2024, 4, 1), datetime(2024, 5, 1),
+                      datetime(2024, 2, 1), datetime(2024, 1, 1)]
+
+def test_months_to_partition_without_history():
+    now = datetime(2024, 3, 17)
+    assert _months_to_partition(datetime(2024, 3, 1), datetime(2024, 4, 1), now) == [datetime(2024, 3, 1), datetime(2024, 4, 1)]
+
+@pytest.mark.parametrize('now, live', [
+    (datetime(2024, 3, 17), True),
+    (datetime(2024, 2, 29, 12), True), # Clock skew around the boundaries
+    (datetime(2024, 4, 1, 12), True),
+    (datetime(2024, 2, 20), False),
+    (datetime(2024, 4, 5), False),
+])
+def test_is_live_month(now, live):
+    assert _is_live_month(datetime(2024, 3, 1), datetime(2024, 4, 1), now) is live
@@ -0,0 +1,55 @@
+from app.routes.pdf_routes import _results_payload
+from app.services.db_service import count_page_classes, rows_to_result, save_analysis_results
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def executemany(self, query, params):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return (11,)
+
+
+# --- Summary documents ---
+
+def test_rows_to_result_groups_by_key_in_order():
+    rows = [('component_name', 'SP-1'), ('page_count', '2'), ('component_name', 'M-2')]
+    assert rows_to_result(rows) == {'component_name': ['SP-1', 'M-2'], 'page_count': ['2']}
+
+def test_rows_to_result_empty():
+    assert rows_to_result([]) == {}
+
+def test_count_page_classes():
+    assert count_page_classes(['text', 'image_only', 'text']) == {'text': 2, 'image_only': 1}
+    assert count_page_classes([]) == {}
+    assert count_page_classes(None) is None
+
+def test_save_analysis_results_upserts_summary_in_same_transaction():
+    cur = FakeCursor()
+    assert save_analysis_results(cur, 3, 'component_extraction', [('component_name', 'SP-1')], ['text']) == 11
+    query, params = cur.executed[-1]
+    assert 'INSERT INTO analysis_summaries' in query
+    assert params[0].adapted == {'component_name': ['SP-1']}
+    assert params[1] == 11
+
+
+# --- Response bodies ---
+
+def test_results_payload_default_type_keeps_components():
+    payload = _results_payload(3, 'a.pdf', 'component_extraction', {'component_name': ['SP-1']})
+    assert payload == {'pdf_id': 3, 'pdf_filename': 'a.pdf', 'analysis_type': 'component_extraction',
+                       'data': {'component_name': ['SP-1']}, 'components': ['SP-1']}
+
+def test_results_payload_default_type_without_components():
+    assert _results_payload(3, 'a.pdf', 'component_extraction', {})['components'] == []
+
+def test_results_payload_other_types_have_no_components():
+    payload = _results_payload(3, 'a.pdf', 'page_statistics', {'page_count': ['2']})
+    assert 'components' not in payload
+    assert payload['data'] == {'page_count': ['2']}